@@ -47,37 +47,43 @@ async def _enrich_jobs_with_costs(db: AsyncSession, jobs: list):
     Enrich jobs with cost information based on token counts and model pricing.
     Adds 'estimated_cost' field to each job dict.
     """
-    # Get all provider models with pricing information
+    if not jobs:
+        return
+    
+    # Get pricing for just the models these jobs used; only the three columns
+    # are needed, so plain rows are fetched instead of hydrating ORM entities
+    model_ids = {job['model'] for job in jobs}
     provider_models_result = await db.execute(
-        select(ProviderModel).where(
+        select(
+            ProviderModel.model_id,
+            ProviderModel.input_price_per_million,
+            ProviderModel.output_price_per_million
+        ).where(
+            ProviderModel.model_id.in_(model_ids),
             ProviderModel.input_price_per_million.isnot(None),
             ProviderModel.output_price_per_million.isnot(None)
         )
     )
-    provider_models = provider_models_result.scalars().all()
     
-    # Create a lookup map: model_id -> pricing info
-    model_pricing = {}
-    for pm in provider_models:
-        model_pricing[pm.model_id] = {
-            'input_price': pm.input_price_per_million,
-            'output_price': pm.output_price_per_million
-        }
+    # Create a lookup map: model_id -> (input price, output price)
+    model_pricing = {
+        model_id: (input_price, output_price)
+        for model_id, input_price, output_price in provider_models_result
+    }
     
     # Calculate cost for each job
     for job in jobs:
         estimated_cost = None
         
         # Check if we have pricing for this model
-        if job['model'] in model_pricing:
-            pricing = model_pricing[job['model']]
+        pricing = model_pricing.get(job['model'])
+        if pricing is not None:
+            input_price, output_price = pricing
             input_tokens = job.get('token_count', 0) or 0
             output_tokens = job.get('output_token_count', 0) or 0
             
-            # Calculate cost: (tokens / 1,000,000) * price_per_million
-            input_cost = (input_tokens / 1_000_000) * pricing['input_price']
-            output_cost = (output_tokens / 1_000_000) * pricing['output_price']
-            estimated_cost = input_cost + output_cost
+            # Calculate cost: tokens * price_per_million / 1,000,000, with a single division
+            estimated_cost = (input_tokens * input_price + output_tokens * output_price) / 1_000_000
         
         # Add to job dict with 4 decimal places
         job['estimated_cost'] = estimated_cost
@@ -12,11 +12,24 @@ OPENAI_ORG_ID  = os.getenv("OPENAI_ORG_ID", "")
 ANTHROPIC_API_KEY= os.getenv("ANTHROPIC_API_KEY", "")
 
 # Google Gemmini API
-GEMINI_API_KEY= os.getenv("GEMINI_API_KEY", "")
+# GEMINI_API_KEY is resolved on attribute access (see __getattr__ below) so
+# runtime changes to the environment are picked up without reloading config
+
+
+def __getattr__(name):
+    if name == "GEMINI_API_KEY":
+        return os.getenv("GEMINI_API_KEY", "")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # ISARtec API / Ollama
 
 
+# Password hashing (bcrypt work factor for admin panel users)
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+if not 4 <= BCRYPT_ROUNDS <= 31:
+    raise ValueError(f"BCRYPT_ROUNDS must be between 4 and 31, got {BCRYPT_ROUNDS}")
+
 # GitHub API
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN", "")
 GITHUB_API_URL = "https://api.github.com"
@@ -0,0 +1,66 @@
+"""
+Shared pytest fixtures
+"""
+import pytest
+import pytest_asyncio
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+import config
+from model.user import Base
+
+
+@pytest.fixture(scope="module")
+def fast_bcrypt():
+    """Hash test passwords with bcrypt's minimum work factor"""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(config, "BCRYPT_ROUNDS", 4)
+        yield
+
+
+@pytest_asyncio.fixture(scope="module")
+async def async_engine():
+    """Create the in-memory test database and its schema once per module"""
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        echo=False,
+        poolclass=StaticPool
+    )
+    
+    # Let SQLAlchemy emit BEGIN itself so the per-test SAVEPOINTs roll back reliably,
+    # and skip journaling/sync work the throwaway database never needs
+    @event.listens_for(engine.sync_engine, "connect")
+    def _configure_connection(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA synchronous=OFF")
+        cursor.execute("PRAGMA journal_mode=MEMORY")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+    
+    @event.listens_for(engine.sync_engine, "begin")
+    def _emit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+    
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    
+    yield engine
+    
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def async_session(async_engine):
+    """Create async test database session whose work is rolled back after each test"""
+    async with async_engine.connect() as conn:
+        transaction = await conn.begin()
+        # Session commits only release savepoints; the outer transaction is never committed
+        session = AsyncSession(
+            bind=conn, expire_on_commit=False, join_transaction_mode="create_savepoint"
+        )
+        
+        yield session
+        
+        await session.close()
+        await transaction.rollback()
@@ -7,7 +7,6 @@ The main task of the controller is to send requests to the Google Gemini API and
 
 import logging
 from typing import Optional
-import google.generativeai as genai
 
 from model.aiapirequest import aiapirequest
 from model.aiapiresult import aiapiresult
@@ -15,6 +14,18 @@ from model.aiapiresult import aiapiresult
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# google.generativeai is slow to import; loaded on first controller setup
+genai = None
+
+
+def _load_genai():
+    """Import google.generativeai on first use and keep it as the module-level genai"""
+    global genai
+    if genai is None:
+        import google.generativeai as genai_module
+        genai = genai_module
+    return genai
+
 
 class GeminiController:
     """Controller for Google Gemini API interactions"""
@@ -27,15 +38,15 @@ class GeminiController:
             strict_mode: If True, raises error when API key is missing
             api_key: Optional API key to use (if not provided, falls back to environment variable)
         """
-        import os
-        from config import GEMINI_API_KEY
+        import config
         self.client = None
         
-        # Use provided API key or fallback to environment variable
-        effective_api_key = api_key or os.environ.get("GEMINI_API_KEY", "") or GEMINI_API_KEY
+        # Use provided API key or fallback to environment variable (read lazily by config)
+        effective_api_key = api_key or config.GEMINI_API_KEY
         
         if effective_api_key:
             try:
+                _load_genai()
                 genai.configure(api_key=effective_api_key)
                 # Verify the configuration works
                 self.client = genai.GenerativeModel('gemini-pro')
@@ -21,7 +21,8 @@ from model.aiapiresult import aiapiresult
 from model.agent_execution import AgentExecutionRequest, AgentExecutionResponse
 from model.pdf_agent_execution import PDFAgentExecutionRequest, PDFAgentExecutionResponse
 from model.docx_agent_execution import DocxAgentExecutionRequest, DocxAgentExecutionResponse
-from model.image_agent_execution import ImageAgentExecutionRequest, ImageAgentExecutionResponse
+from model.image_agent_execution import ImageAgentExecutionRequestAdapter, ImageAgentExecutionResponse
+from model.health import HealthResponse, SecureEndpointResponse
 from model.job import JobCreate
 from model.github_issue import GitHubIssueRequest, GitHubIssueResponse
 from model.ai_audit_log import AIAuditLogCreate
@@ -44,7 +45,6 @@ from logging_config import LoggingConfig
 from utils.request_utils import get_client_ip, extract_auth_token
 from utils.token_counter import count_tokens
 from pydantic import ValidationError
-import config
 
 # Initialize logging system
 LoggingConfig.setup_logging()
@@ -173,7 +173,7 @@ app.openapi = custom_api
 # Include admin routes
 app.include_router(admin_router)
 
-@app.get("/health")
+@app.get("/health", response_model=HealthResponse, response_model_exclude_none=True)
 async def health(api_key: Optional[str] = Query(None, description="API Key in format client_id:client_secret")):
     """Health check endpoint with optional authentication"""
     response = {"status": "ok"}
@@ -203,7 +203,7 @@ async def health(api_key: Optional[str] = Query(None, description="API Key in fo
     return response
 
 
-@app.get("/secure-endpoint")
+@app.get("/secure-endpoint", response_model=SecureEndpointResponse)
 async def secure_endpoint(current_user: User = Depends(authenticate_user_by_token)):
     """Example of a secured endpoint requiring Bearer token authentication"""
     return {
@@ -463,9 +463,7 @@ async def execute_agent(request: Request, agent_request: AgentExecutionRequest,
                     cache_metadata = CacheMetadata(
                         status=cache_status,
                         cached_at=datetime.now(timezone.utc).isoformat(),
-                        ttl=agent_request.cache_ttl or (
-                            config.CACHE_ERROR_TTL if status == "failed" else config.CACHE_DEFAULT_TTL
-                        )
+                        ttl=agent_request.cache_ttl or CacheService.ttl_for_status(status)
                     )
                 else:
                     cache_metadata = CacheMetadata(
@@ -1175,7 +1173,7 @@ async def execute_agent_image(
             )
         
         try:
-            image_request = ImageAgentExecutionRequest(**request_data)
+            image_request = ImageAgentExecutionRequestAdapter.validate_python(request_data)
         except ValidationError as e:
             raise HTTPException(
                 status_code=400,
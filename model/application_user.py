@@ -15,6 +15,7 @@ from sqlalchemy.orm import Mapped, mapped_column
 from pydantic import BaseModel, ConfigDict, Field, EmailStr
 
 from model.user import Base  # Import the existing Base
+import config
 
 
 class ApplicationUser(Base):
@@ -32,8 +33,8 @@ class ApplicationUser(Base):
 
     def set_password(self, password: str) -> None:
         """Hash and set password using bcrypt"""
-        # Generate salt and hash password
-        salt = bcrypt.gensalt()
+        # Generate salt (work factor from config) and hash password
+        salt = bcrypt.gensalt(rounds=config.BCRYPT_ROUNDS)
         self.password_hash = bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
     
     def verify_password(self, password: str) -> bool:
@@ -0,0 +1,19 @@
+"""
+Response models for the health check and example secured endpoints
+"""
+from pydantic import BaseModel
+from typing import Optional
+
+
+class HealthResponse(BaseModel):
+    """Response model for the health check endpoint"""
+    status: str
+    authenticated_user: Optional[str] = None
+    client_id: Optional[str] = None
+
+
+class SecureEndpointResponse(BaseModel):
+    """Response model for the example secured endpoint"""
+    message: str
+    user: str
+    client_id: str
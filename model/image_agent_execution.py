@@ -1,7 +1,7 @@
 """
 Models for Image Agent Execution API
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
 from typing import Optional, Dict, Any
 
 
@@ -14,6 +14,10 @@ class ImageAgentExecutionRequest(BaseModel):
     parameters: Optional[Dict[str, Any]] = Field(default=None, description="Optional key-value parameters for the agent")
 
 
+# Reusable validator for the form-encoded request JSON; validates a dict without **kwargs unpacking
+ImageAgentExecutionRequestAdapter = TypeAdapter(ImageAgentExecutionRequest)
+
+
 class ImageAgentExecutionResponse(BaseModel):
     """Response model for Image agent execution"""
     success: bool
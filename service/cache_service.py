@@ -2,20 +2,24 @@
 Redis Cache Service for KIGate Agent Execution
 
 Implements cache-aside strategy with:
-- SHA256 fingerprint-based cache keys
+- BLAKE2b (128-bit) fingerprint-based cache keys
 - Concurrency handling with locks
 - Configurable TTL
 - Cache hit/miss tracking
 """
 import asyncio
+import functools
 import hashlib
 import json
 import time
 import logging
-from typing import Optional, Dict, Any, Tuple
+import secrets
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime, timezone
 
+import cbor2
 import redis
+from redis.commands.core import Script
 from redis.exceptions import RedisError, ConnectionError as RedisConnectionError
 
 import config
@@ -23,12 +27,93 @@ import config
 logger = logging.getLogger(__name__)
 
 
+# Parameter value types whose items can key the hash memo once type-tagged
+_MEMO_VALUE_TYPES = frozenset({str, int, float, bool, type(None)})
+
+
+# Canonical CBOR of {"message": ..., "parameters": ...} is a two-entry map header
+# followed by the keys in canonical order (shorter first), each before its value
+_CACHE_DATA_HEAD = b"\xa2" + cbor2.dumps("message")
+_PARAMETERS_KEY = cbor2.dumps("parameters")
+
+
+def _encode_parameters(parameters: Dict[str, Any]) -> bytes:
+    """Canonical CBOR encoding of the request parameters"""
+    return cbor2.dumps(parameters, canonical=True)
+
+
+def _digest_cache_inputs(message: str, encoded_parameters: bytes) -> str:
+    """
+    Hash the message and encoded parameters of a request
+    
+    Streams the same bytes as the canonical CBOR of the combined request
+    data, so the message never has to be copied into a larger buffer.
+    """
+    # Generate 128-bit BLAKE2b hash (stdlib, 32 hex chars)
+    digest = hashlib.blake2b(_CACHE_DATA_HEAD, digest_size=16)
+    digest.update(cbor2.dumps(message))
+    digest.update(_PARAMETERS_KEY)
+    digest.update(encoded_parameters)
+    return digest.hexdigest()
+
+
+def _memo_items(parameters: Dict[str, Any]) -> Optional[Tuple[Tuple[str, Any, Any], ...]]:
+    """
+    Build a hashable memo key for flat scalar parameters, or None if they are not
+    
+    Values that compare equal can still encode differently (True, 1 and 1.0;
+    0.0 and -0.0), so each value is tagged with its type, floats with their
+    exact hex form.
+    """
+    for key, value in parameters.items():
+        if type(key) is not str or type(value) not in _MEMO_VALUE_TYPES:
+            return None
+    return tuple(
+        (key, value.hex() if type(value) is float else type(value), value)
+        for key, value in sorted(parameters.items())
+    )
+
+
+@functools.lru_cache(maxsize=256)
+def _encode_parameter_items(items: Tuple[Tuple[str, Any, Any], ...]) -> bytes:
+    """
+    Memoized _encode_parameters for type-tagged parameter items
+    
+    Only the parameters are memoized; messages hold user content and are
+    hashed on every call instead of being kept in process memory.
+    """
+    return _encode_parameters({key: value for key, _, value in items})
+
+
 class CacheService:
     """Service for managing Redis cache for agent executions"""
     
     _redis_client: Optional[redis.Redis] = None
+    _release_script: Optional[Script] = None
     _initialized = False
     
+    # Unlinks the lock only while it still holds the caller's token, so a lock
+    # that expired and was re-acquired elsewhere is never released by mistake
+    LUA_RELEASE_LOCK = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("unlink", KEYS[1])
+end
+return 0
+"""
+    
+    # clear_cache scans with a large COUNT hint and unlinks keys in fixed-size
+    # pipelined batches instead of collecting every key into one DEL
+    SCAN_COUNT = 10_000
+    CLEAR_BATCH_SIZE = 1000
+    
+    # Config setting holding the TTL for each job status; values are resolved
+    # at call time so runtime config overrides still apply
+    _STATUS_TTL = {
+        "completed": "CACHE_DEFAULT_TTL",
+        "failed": "CACHE_ERROR_TTL",
+        "timeout": "CACHE_ERROR_TTL",
+    }
+    
     @classmethod
     def initialize(cls):
         """Initialize Redis connection"""
@@ -41,7 +126,7 @@ class CacheService:
                 cls._initialized = True
                 return
             
-            cls._redis_client = redis.Redis(
+            client = redis.Redis(
                 host=config.REDIS_HOST,
                 port=config.REDIS_PORT,
                 db=config.REDIS_DB,
@@ -52,19 +137,28 @@ class CacheService:
             )
             
             # Test connection
-            cls._redis_client.ping()
+            client.ping()
+            
+            cls._attach_client(client)
             logger.info(f"Redis cache initialized successfully at {config.REDIS_HOST}:{config.REDIS_PORT}")
             cls._initialized = True
             
         except (RedisConnectionError, RedisError) as e:
             logger.warning(f"Redis connection failed: {str(e)}. Cache will be disabled.")
-            cls._redis_client = None
+            cls._attach_client(None)
             cls._initialized = True
         except Exception as e:
             logger.error(f"Unexpected error initializing Redis: {str(e)}")
-            cls._redis_client = None
+            cls._attach_client(None)
             cls._initialized = True
     
+    @classmethod
+    def _attach_client(cls, client: Optional[redis.Redis]) -> None:
+        """Use client for all cache operations, registering the lock script against it"""
+        cls._redis_client = client
+        # Script SHA is computed locally; EVALSHA falls back to EVAL on first use
+        cls._release_script = client.register_script(cls.LUA_RELEASE_LOCK) if client is not None else None
+    
     @classmethod
     def is_available(cls) -> bool:
         """Check if Redis cache is available"""
@@ -72,6 +166,11 @@ class CacheService:
             cls.initialize()
         return cls._redis_client is not None
     
+    @classmethod
+    def ttl_for_status(cls, status: str) -> int:
+        """Get the default cache TTL in seconds for a job status"""
+        return getattr(config, cls._STATUS_TTL.get(status, "CACHE_DEFAULT_TTL"))
+    
     @classmethod
     def _generate_cache_key(
         cls,
@@ -87,17 +186,14 @@ class CacheService:
         
         Format: kigate:v1:agent-exec:{agent_name}:{provider}:{model}:u:{user_id}:h:{hash}
         """
-        # Create canonical JSON representation for hashing
-        cache_data = {
-            "message": message,
-            "parameters": parameters or {}
-        }
-        
-        # Sort keys for consistent hashing
-        canonical_json = json.dumps(cache_data, sort_keys=True, ensure_ascii=True)
-        
-        # Generate SHA256 hash
-        hash_digest = hashlib.sha256(canonical_json.encode('utf-8')).hexdigest()
+        params = parameters or {}
+        items = _memo_items(params)
+        if items is None:
+            # Nested or non-scalar values, encode without memoization
+            encoded_parameters = _encode_parameters(params)
+        else:
+            encoded_parameters = _encode_parameter_items(items)
+        hash_digest = _digest_cache_inputs(message, encoded_parameters)
         
         # Build cache key
         cache_key = f"kigate:v1:agent-exec:{agent_name}:{provider}:{model}:u:{user_id}:h:{hash_digest}"
@@ -182,46 +278,120 @@ class CacheService:
             return False
         
         try:
-            cache_key = cls._generate_cache_key(
-                agent_name, provider, model, user_id, message, parameters
+            cache_key, ttl, payload = cls._build_cache_entry(
+                agent_name, provider, model, user_id, message,
+                result, status, job_id, parameters, ttl
             )
             
-            # Determine TTL based on status
-            if ttl is None:
-                if status == "failed":
-                    ttl = config.CACHE_ERROR_TTL
-                else:
-                    ttl = config.CACHE_DEFAULT_TTL
+            # Store in cache with TTL
+            cls._redis_client.setex(cache_key, ttl, payload)
             
-            # Prepare cache data
-            cache_data = {
-                "result": result,
-                "status": status,
-                "job_id": job_id,
-                "metadata": {
-                    "cached_at": datetime.now(timezone.utc).isoformat(),
-                    "agent_name": agent_name,
-                    "provider": provider,
-                    "model": model
-                }
-            }
+            logger.info(f"Cached result for key: {cache_key[:80]}... (TTL: {ttl}s)")
+            return True
             
-            # Store in cache with TTL
-            cls._redis_client.setex(
-                cache_key,
-                ttl,
-                json.dumps(cache_data)
+        except Exception as e:
+            logger.error(f"Error storing in cache: {str(e)}")
+            return False
+    
+    @classmethod
+    async def finalize(
+        cls,
+        agent_name: str,
+        provider: str,
+        model: str,
+        user_id: str,
+        message: str,
+        result: str,
+        status: str,
+        job_id: str,
+        lock_token: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        ttl: Optional[int] = None
+    ) -> bool:
+        """
+        Store the result and release the execution lock in one round-trip
+        
+        Equivalent to set_cached_result followed by release_lock, but both
+        commands go out in a single non-transactional pipeline.
+        
+        Args:
+            lock_token: Owner token returned by acquire_lock
+            ttl: Time to live in seconds. If None, uses default from config
+        
+        Returns:
+            True if successfully cached, False otherwise
+        """
+        if not cls.is_available():
+            return False
+        
+        try:
+            cache_key, ttl, payload = cls._build_cache_entry(
+                agent_name, provider, model, user_id, message,
+                result, status, job_id, parameters, ttl
             )
+            lock_key = cls._get_lock_key(cache_key)
+            
+            pipe = cls._redis_client.pipeline(transaction=False)
+            pipe.setex(cache_key, ttl, payload)
+            # Plain EVAL: a registered Script would make the pipeline issue
+            # SCRIPT EXISTS first, costing the round-trip this method saves
+            pipe.eval(cls.LUA_RELEASE_LOCK, 1, lock_key, lock_token)
+            _, released = pipe.execute()
             
             logger.info(f"Cached result for key: {cache_key[:80]}... (TTL: {ttl}s)")
+            if not released:
+                logger.debug(f"Lock not held with given token for key: {cache_key[:80]}...")
             return True
             
         except Exception as e:
-            logger.error(f"Error storing in cache: {str(e)}")
+            logger.error(f"Error finalizing cache entry: {str(e)}")
             return False
     
     @classmethod
-    async def acquire_lock(cls, cache_key: str, timeout: int = 30) -> bool:
+    def _build_cache_entry(
+        cls,
+        agent_name: str,
+        provider: str,
+        model: str,
+        user_id: str,
+        message: str,
+        result: str,
+        status: str,
+        job_id: str,
+        parameters: Optional[Dict[str, Any]],
+        ttl: Optional[int]
+    ) -> Tuple[str, int, str]:
+        """
+        Build the cache key, TTL and serialized payload for a result
+        
+        Returns:
+            Tuple of (cache_key, ttl, payload)
+        """
+        cache_key = cls._generate_cache_key(
+            agent_name, provider, model, user_id, message, parameters
+        )
+        
+        # Determine TTL based on status
+        if ttl is None:
+            ttl = cls.ttl_for_status(status)
+        
+        # Prepare cache data
+        cache_data = {
+            "result": result,
+            "status": status,
+            "job_id": job_id,
+            "metadata": {
+                "cached_at": datetime.now(timezone.utc).isoformat(),
+                "agent_name": agent_name,
+                "provider": provider,
+                "model": model
+            }
+        }
+        
+        return cache_key, ttl, json.dumps(cache_data)
+    
+    @classmethod
+    async def acquire_lock(cls, cache_key: str, timeout: int = 30) -> Optional[str]:
         """
         Acquire a lock for the cache key to prevent concurrent executions
         
@@ -230,17 +400,19 @@ class CacheService:
             timeout: Lock timeout in seconds
         
         Returns:
-            True if lock acquired, False otherwise
+            Random owner token stored in the lock, required again to release it,
+            or None if the lock was not acquired
         """
         if not cls.is_available():
-            return False
+            return None
         
         try:
             lock_key = cls._get_lock_key(cache_key)
+            token = secrets.token_hex(16)
             # Use SETNX (SET if Not eXists) with expiration
             acquired = cls._redis_client.set(
                 lock_key, 
-                "1", 
+                token, 
                 nx=True,  # Only set if not exists
                 ex=timeout  # Expire after timeout seconds
             )
@@ -250,19 +422,22 @@ class CacheService:
             else:
                 logger.debug(f"Lock already held for key: {cache_key[:80]}...")
             
-            return bool(acquired)
+            return token if acquired else None
             
         except Exception as e:
             logger.error(f"Error acquiring lock: {str(e)}")
-            return False
+            return None
     
     @classmethod
-    async def release_lock(cls, cache_key: str) -> bool:
+    async def release_lock(cls, cache_key: str, token: str) -> bool:
         """
         Release a lock for the cache key
         
+        The ownership check and unlink run atomically in a single Lua script.
+        
         Args:
             cache_key: The cache key to unlock
+            token: Owner token returned by acquire_lock
         
         Returns:
             True if lock released, False otherwise
@@ -272,9 +447,16 @@ class CacheService:
         
         try:
             lock_key = cls._get_lock_key(cache_key)
-            cls._redis_client.delete(lock_key)
-            logger.debug(f"Lock released for key: {cache_key[:80]}...")
-            return True
+            released = cls._release_script(
+                keys=[lock_key], args=[token], client=cls._redis_client
+            )
+            
+            if released:
+                logger.debug(f"Lock released for key: {cache_key[:80]}...")
+            else:
+                logger.debug(f"Lock not held with given token for key: {cache_key[:80]}...")
+            
+            return bool(released)
             
         except Exception as e:
             logger.error(f"Error releasing lock: {str(e)}")
@@ -299,17 +481,37 @@ class CacheService:
             if pattern is None:
                 pattern = "kigate:v1:agent-exec:*"
             
-            # Find all matching keys
-            keys = list(cls._redis_client.scan_iter(match=pattern))
+            deleted = 0
+            batch: List[str] = []
+            for key in cls._redis_client.scan_iter(match=pattern, count=cls.SCAN_COUNT):
+                batch.append(key)
+                if len(batch) >= cls.CLEAR_BATCH_SIZE:
+                    deleted += cls._unlink_batch(batch)
+                    batch = []
+            
+            if batch:
+                deleted += cls._unlink_batch(batch)
             
-            if keys:
-                deleted = cls._redis_client.delete(*keys)
+            if deleted:
                 logger.info(f"Cleared {deleted} cache entries matching pattern: {pattern}")
-                return deleted
             
-            return 0
+            return deleted
             
         except Exception as e:
             logger.error(f"Error clearing cache: {str(e)}")
             return 0
-
+    
+    @classmethod
+    def _unlink_batch(cls, keys: List[str]) -> int:
+        """
+        Unlink a batch of keys in a single non-transactional pipeline
+        
+        UNLINK frees the values in a Redis background thread, so large
+        batches do not block the server the way DEL would.
+        
+        Returns:
+            Number of keys removed
+        """
+        pipe = cls._redis_client.pipeline(transaction=False)
+        pipe.unlink(*keys)
+        return sum(pipe.execute())
@@ -2,13 +2,33 @@
 DOCX Service for extracting text content from DOCX files
 """
 import logging
-from typing import List, BinaryIO
+from typing import List, BinaryIO, Tuple
 from fastapi import UploadFile, HTTPException
 import io
+import re
 from docx import Document
 
 logger = logging.getLogger(__name__)
 
+# Sentence endings chunk_text may break after: ". ", "! ", ".\n", "?\n"
+SENTENCE_BREAK_RE = re.compile(r"[.!] |[.?]\n")
+
+
+def _parse_docx(content: bytes) -> Tuple[List[str], List[List[List[str]]]]:
+    """
+    Read body paragraph texts and table cell texts with python-docx
+    
+    Returns:
+        Tuple of (paragraph texts, tables as rows of cell texts)
+    """
+    document = Document(io.BytesIO(content))
+    paragraphs = [paragraph.text for paragraph in document.paragraphs]
+    tables = [
+        [[cell.text for cell in row.cells] for row in table.rows]
+        for table in document.tables
+    ]
+    return paragraphs, tables
+
 
 class DocxService:
     """Service for handling DOCX operations"""
@@ -31,31 +51,28 @@ class DocxService:
             # Read the file content
             content = await docx_file.read()
             
-            # Create a file-like object from the bytes
-            docx_stream = io.BytesIO(content)
-            
-            # Create Document reader
-            document = Document(docx_stream)
+            # Parse paragraphs and tables from the document
+            paragraphs, tables = _parse_docx(content)
             
             # Extract text from all paragraphs
             text_content = []
             paragraph_count = 0
             
-            for paragraph in document.paragraphs:
-                paragraph_text = paragraph.text.strip()
+            for paragraph in paragraphs:
+                paragraph_text = paragraph.strip()
                 if paragraph_text:  # Only add non-empty paragraphs
                     paragraph_count += 1
                     text_content.append(paragraph_text)
             
             # Also extract text from tables if present
             table_count = 0
-            for table in document.tables:
+            for table in tables:
                 table_count += 1
                 table_text = []
-                for row in table.rows:
+                for row in table:
                     row_text = []
-                    for cell in row.cells:
-                        cell_text = cell.text.strip()
+                    for cell in row:
+                        cell_text = cell.strip()
                         if cell_text:
                             row_text.append(cell_text)
                     if row_text:
@@ -129,13 +146,10 @@ class DocxService:
                 if paragraph_break > search_start:
                     end = paragraph_break + 1
                 else:
-                    # Look for sentence endings
-                    sentence_break = max(
-                        text.rfind('. ', search_start, end),
-                        text.rfind('.\n', search_start, end),
-                        text.rfind('! ', search_start, end),
-                        text.rfind('?\n', search_start, end)
-                    )
+                    # Look for the last sentence ending in one regex pass
+                    sentence_break = -1
+                    for match in SENTENCE_BREAK_RE.finditer(text, search_start, end):
+                        sentence_break = match.start()
                     if sentence_break > search_start:
                         end = sentence_break + 2
                     # Otherwise use the character limit
@@ -171,18 +185,23 @@ class DocxService:
         if len(chunk_results) == 1:
             return chunk_results[0]
         
-        # Create a structured summary format
-        merged_result = f"# {agent_name} Analysis Results\n\n"
-        merged_result += f"This document was processed in {len(chunk_results)} parts. Below are the consolidated results:\n\n"
-        
-        for i, result in enumerate(chunk_results, 1):
-            merged_result += f"## Section {i} Results\n\n{result}\n\n"
+        # Create a structured summary format, collected as parts and joined once
+        parts = [
+            f"# {agent_name} Analysis Results\n\n",
+            f"This document was processed in {len(chunk_results)} parts. Below are the consolidated results:\n\n",
+        ]
+        parts.extend(
+            f"## Section {i} Results\n\n{result}\n\n"
+            for i, result in enumerate(chunk_results, 1)
+        )
         
         # Add a brief summary if we have multiple sections
         if len(chunk_results) > 2:
-            merged_result += "## Overall Summary\n\n"
-            merged_result += "The document has been analyzed in multiple sections. "
-            merged_result += "Please review each section above for detailed findings. "
-            merged_result += f"Total sections processed: {len(chunk_results)}\n"
+            parts.append(
+                "## Overall Summary\n\n"
+                "The document has been analyzed in multiple sections. "
+                "Please review each section above for detailed findings. "
+                f"Total sections processed: {len(chunk_results)}\n"
+            )
         
-        return merged_result
\ No newline at end of file
+        return "".join(parts)
\ No newline at end of file
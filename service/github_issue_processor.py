@@ -3,6 +3,7 @@ GitHub Issue Processor Service for improving text and generating issue metadata
 """
 import json
 import logging
+import re
 import uuid
 from typing import Optional
 from model.github_issue import ProcessedIssueContent, IssueType
@@ -12,6 +13,10 @@ from database import get_async_session
 
 logger = logging.getLogger(__name__)
 
+# Fallback issue type keywords, matched as substrings of the lowercased input
+BUG_KEYWORDS_RE = re.compile("bug|error|fix|broken|issue")
+FEATURE_KEYWORDS_RE = re.compile("feature|add|new|enhance|improve")
+
 class GitHubIssueProcessor:
     """Service for processing text into improved GitHub issues using AI"""
     
@@ -158,9 +163,9 @@ Input text to process:"""
             
             # Basic issue type detection
             text_lower = original_text.lower()
-            if any(word in text_lower for word in ["bug", "error", "fix", "broken", "issue"]):
+            if BUG_KEYWORDS_RE.search(text_lower):
                 issue_type = IssueType.BUG
-            elif any(word in text_lower for word in ["feature", "add", "new", "enhance", "improve"]):
+            elif FEATURE_KEYWORDS_RE.search(text_lower):
                 issue_type = IssueType.FEATURE
             else:
                 issue_type = IssueType.TASK
@@ -1,11 +1,19 @@
 """
 GitHub Service for creating issues via GitHub API
 """
+import re
 import httpx
 from typing import Optional
 from model.github_issue import GitHubIssueResponse, ProcessedIssueContent, IssueType
 import config
 
+# owner/repo where each part is word characters, "." or "-" with at least one letter or digit;
+# the lookahead runs once per part, so matching stays linear in the input length
+REPOSITORY_SEGMENT = r"(?=[\w.-]*[^\W_])[\w.-]+"
+REPOSITORY_RE = re.compile(rf"{REPOSITORY_SEGMENT}/{REPOSITORY_SEGMENT}")
+# GitHub limits owner names to 39 and repository names to 100 characters
+MAX_REPOSITORY_LENGTH = 140
+
 class GitHubService:
     """Service for interacting with GitHub API"""
     
@@ -107,21 +115,8 @@ class GitHubService:
         Returns:
             True if valid format, False otherwise
         """
-        if not repository or "/" not in repository:
-            return False
-        
-        parts = repository.split("/")
-        if len(parts) != 2:
-            return False
-        
-        owner, repo = parts
-        if not owner or not repo:
-            return False
-        
-        # Basic validation for GitHub username/org and repo name
-        if not owner.replace("-", "").replace("_", "").replace(".", "").isalnum():
-            return False
-        if not repo.replace("-", "").replace("_", "").replace(".", "").isalnum():
-            return False
-            
-        return True
\ No newline at end of file
+        return (
+            bool(repository)
+            and len(repository) <= MAX_REPOSITORY_LENGTH
+            and REPOSITORY_RE.fullmatch(repository) is not None
+        )
@@ -1,24 +1,41 @@
 """
 Image Service for handling image files and converting them to base64
 """
+import functools
 import logging
-import base64
-from typing import List
+import pybase64
 from fastapi import UploadFile, HTTPException
-import io
 
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=256)
+def _is_supported_image(content_type: str, extension: str) -> bool:
+    """Memoized allow-list check, extension first, then MIME type"""
+    return (
+        extension.lower() in ImageService.SUPPORTED_IMAGE_EXTENSIONS
+        or content_type.lower() in ImageService.SUPPORTED_IMAGE_TYPES
+    )
+
+
 class ImageService:
     """Service for handling image operations"""
     
     # Supported image MIME types
-    SUPPORTED_IMAGE_TYPES = {
+    SUPPORTED_IMAGE_TYPES = frozenset({
         'image/png',
         'image/jpeg',
         'image/webp'
-    }
+    })
+    
+    # Supported image file extensions (lowercase, without the dot)
+    SUPPORTED_IMAGE_EXTENSIONS = frozenset({'png', 'jpg', 'jpeg', 'webp'})
+    
+    # Maximum accepted upload size (10MB)
+    MAX_IMAGE_SIZE = 10 * 1024 * 1024
+    
+    # Upload read size; a multiple of 3 so each chunk encodes without base64 padding
+    READ_CHUNK_SIZE = 48 * 1024
     
     @staticmethod
     async def convert_image_to_base64(image_file: UploadFile) -> str:
@@ -35,21 +52,32 @@ class ImageService:
             HTTPException: If image cannot be processed
         """
         try:
-            # Read the file content
-            content = await image_file.read()
+            max_size = ImageService.MAX_IMAGE_SIZE
+            
+            # Reject on the declared upload size before reading any of the body
+            if image_file.size is not None and image_file.size > max_size:
+                raise ImageService._image_too_large(max_size)
             
-            # Validate content size (limit to 10MB)
-            max_size = 10 * 1024 * 1024  # 10MB
-            if len(content) > max_size:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Image file too large. Maximum size is {max_size / (1024*1024):.1f}MB"
-                )
+            encoded = bytearray()
+            pending = b""
+            size = 0
             
-            # Convert to base64
-            base64_image = base64.b64encode(content).decode('utf-8')
+            # Read and encode the upload chunk by chunk, failing as soon as it exceeds the limit
+            while chunk := await image_file.read(ImageService.READ_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_size:
+                    raise ImageService._image_too_large(max_size)
+                
+                # Only encode whole 3-byte groups so the pieces concatenate without padding
+                data = pending + chunk
+                cut = len(data) - len(data) % 3
+                encoded += pybase64.b64encode(data[:cut])
+                pending = data[cut:]
             
-            logger.info(f"Successfully converted image '{image_file.filename}' to base64 (size: {len(content)} bytes)")
+            encoded += pybase64.b64encode(pending)
+            base64_image = encoded.decode('ascii')
+            
+            logger.info(f"Successfully converted image '{image_file.filename}' to base64 (size: {size} bytes)")
             
             return base64_image
             
@@ -62,6 +90,14 @@ class ImageService:
                 detail=f"Failed to process image: {str(e)}"
             )
     
+    @staticmethod
+    def _image_too_large(max_size: int) -> HTTPException:
+        """Build the error raised for uploads over the size limit"""
+        return HTTPException(
+            status_code=400,
+            detail=f"Image file too large. Maximum size is {max_size / (1024*1024):.1f}MB"
+        )
+    
     @staticmethod
     def validate_image_type(content_type: str, filename: str) -> bool:
         """
@@ -77,16 +113,12 @@ class ImageService:
         Raises:
             HTTPException: If image type is not supported
         """
-        # Check MIME type
-        if content_type and content_type.lower() in ImageService.SUPPORTED_IMAGE_TYPES:
+        # Key the cache on the extension rather than the full filename, so uploads with the
+        # same extension and content type share an entry
+        _, dot, extension = (filename or '').rpartition('.')
+        if _is_supported_image(content_type or '', extension if dot else ''):
             return True
         
-        # Check file extension as fallback
-        if filename:
-            lower_filename = filename.lower()
-            if any(lower_filename.endswith(ext) for ext in ['.png', '.jpg', '.jpeg', '.webp']):
-                return True
-        
         # Raise error if not supported
         supported_formats = ', '.join([ext.replace('image/', '') for ext in ImageService.SUPPORTED_IMAGE_TYPES])
         raise HTTPException(
@@ -3,20 +3,32 @@ Integration tests for Redis Cache with Agent Execution endpoint
 """
 import pytest
 import json
-from unittest.mock import Mock, patch, MagicMock, AsyncMock
+from unittest.mock import Mock, patch, AsyncMock, ANY, create_autospec
 import asyncio
 
+import redis
+
 from service.cache_service import CacheService
 from model.agent_execution import AgentExecutionRequest, AgentExecutionResponse, CacheMetadata
 from model.agent import Agent
 import config
 
+# Shares the CacheService singleton with test_cache_service.py
+pytestmark = pytest.mark.xdist_group("cache_service")
+
+
+@pytest.fixture(scope="module")
+def redis_autospec():
+    """Autospecced Redis client, built once per module"""
+    return create_autospec(redis.Redis, instance=True)
+
 
 @pytest.fixture
-def mock_redis():
+def mock_redis(redis_autospec):
     """Fixture for mocked Redis client"""
+    redis_instance = redis_autospec
+    redis_instance.reset_mock(return_value=True, side_effect=True)
     with patch('service.cache_service.redis.Redis') as mock:
-        redis_instance = MagicMock()
         redis_instance.ping.return_value = True
         redis_instance.get.return_value = None
         redis_instance.setex.return_value = True
@@ -25,6 +37,7 @@ def mock_redis():
         redis_instance.exists.return_value = False
         redis_instance.ttl.return_value = 3600
         redis_instance.scan_iter.return_value = iter([])
+        redis_instance.pipeline.return_value.execute.return_value = []
         mock.return_value = redis_instance
         yield redis_instance
 
@@ -32,10 +45,10 @@ def mock_redis():
 @pytest.fixture
 def reset_cache_service():
     """Reset CacheService singleton state between tests"""
-    CacheService._redis_client = None
+    CacheService._attach_client(None)
     CacheService._initialized = False
     yield
-    CacheService._redis_client = None
+    CacheService._attach_client(None)
     CacheService._initialized = False
 
 
@@ -251,16 +264,16 @@ class TestAgentExecutionCacheIntegration:
             cache_key = "test-cache-key"
             
             # First acquire should succeed
-            acquired1 = await CacheService.acquire_lock(cache_key)
-            assert acquired1 is True, "First lock acquisition should succeed"
+            token = await CacheService.acquire_lock(cache_key)
+            assert token is not None, "First lock acquisition should succeed"
             
             # Second acquire should fail (lock already held)
             mock_redis.set.return_value = None  # Simulate lock already exists
-            acquired2 = await CacheService.acquire_lock(cache_key)
-            assert acquired2 is False, "Second lock acquisition should fail"
+            second_token = await CacheService.acquire_lock(cache_key)
+            assert second_token is None, "Second lock acquisition should fail"
             
             # Release lock
-            released = await CacheService.release_lock(cache_key)
+            released = await CacheService.release_lock(cache_key, token)
             assert released is True, "Lock release should succeed"
     
     @pytest.mark.asyncio
@@ -275,12 +288,13 @@ class TestAgentExecutionCacheIntegration:
                 "kigate:v1:agent-exec:agent2:openai:gpt-4:u:user1:h:hash2"
             ]
             mock_redis.scan_iter.return_value = iter(test_keys)
-            mock_redis.delete.return_value = len(test_keys)
+            mock_redis.pipeline.return_value.execute.return_value = [len(test_keys)]
             
             deleted = CacheService.clear_cache("kigate:v1:agent-exec:*")
             
             assert deleted == 2, "Should delete all matching keys"
-            mock_redis.delete.assert_called_once_with(*test_keys)
+            mock_redis.scan_iter.assert_called_once_with(match=ANY, count=10_000)
+            mock_redis.pipeline.return_value.unlink.assert_called_once_with(*test_keys)
     
     def test_agent_execution_request_validation(self):
         """Test that AgentExecutionRequest validates cache parameters"""
@@ -3,7 +3,8 @@ Integration test for agent cloning via admin routes
 """
 import pytest
 from unittest.mock import AsyncMock, patch
-from fastapi.testclient import TestClient
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
 from model.agent import Agent
 
 
@@ -43,7 +44,8 @@ async def test_clone_agent_endpoint():
         assert response.body is not None
         
         # Verify clone_agent was called
-        mock_clone.assert_called_once_with("endpoint-test-agent")
+        assert mock_clone.call_count == 1
+        assert mock_clone.call_args.args == ("endpoint-test-agent",)
 
 
 @pytest.mark.asyncio
@@ -60,3 +62,35 @@ async def test_clone_agent_endpoint_not_found():
             await clone_agent(name="nonexistent", admin_user="test_admin")
         
         assert exc_info.value.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_clone_agent_endpoint_http():
+    """Test the clone route over HTTP on the test's own event loop"""
+    from admin_routes import admin_router
+    from admin_auth import get_admin_user
+    
+    app = FastAPI()
+    app.include_router(admin_router)
+    app.dependency_overrides[get_admin_user] = lambda: "test_admin"
+    
+    cloned_agent = Agent(
+        name="klone: endpoint-test-agent",
+        description="Test Agent for Endpoint",
+        provider="openai",
+        model="gpt-4",
+        role="Test Role",
+        task="Test Task"
+    )
+    
+    with patch('admin_routes.AgentService.clone_agent', new_callable=AsyncMock) as mock_clone:
+        mock_clone.return_value = cloned_agent
+        
+        # ASGITransport dispatches straight into the app, no TestClient thread hand-off
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            response = await ac.post("/admin/agents/endpoint-test-agent/clone")
+        
+        assert response.status_code == 200
+        assert response.json()["cloned_agent"]["name"] == "klone: endpoint-test-agent"
+        assert mock_clone.call_count == 1
+        assert mock_clone.call_args.args == ("endpoint-test-agent",)
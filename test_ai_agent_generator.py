@@ -142,10 +142,13 @@ async def run_all_tests():
     print("Running AI Agent Generator Tests")
     print("=" * 50)
     
-    await test_service_creation_prompt()
-    await test_parameters_yaml_conversion()
-    await test_empty_parameters()
-    await test_model_validation()
+    # The offline checks are independent of each other, so run them together
+    await asyncio.gather(
+        test_service_creation_prompt(),
+        test_parameters_yaml_conversion(),
+        test_empty_parameters(),
+        test_model_validation(),
+    )
     await test_agent_generation_with_mock()
     
     print("\n" + "=" * 50)
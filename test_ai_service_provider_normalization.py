@@ -3,10 +3,20 @@ Tests for AI service provider name normalization
 """
 import pytest
 import pytest_asyncio
-from unittest.mock import AsyncMock, patch, MagicMock, ANY
+from unittest.mock import AsyncMock, patch, MagicMock
 from model.aiapirequest import aiapirequest
 from model.aiapiresult import aiapiresult
 from service.ai_service import send_ai_request
+import controller.api_openai
+import controller.api_gemini
+import controller.api_claude
+
+
+def _async_return(value):
+    """Coroutine function returning value, a lighter stand-in for AsyncMock"""
+    async def _stub(*args, **kwargs):
+        return value
+    return _stub
 
 
 @pytest.mark.asyncio
@@ -27,119 +37,119 @@ async def test_google_gemini_normalization():
         success=True
     )
     
-    with patch('controller.api_gemini.process_gemini_request', new_callable=AsyncMock) as mock_gemini:
-        mock_gemini.return_value = mock_result
-        
+    with patch.object(controller.api_gemini, 'process_gemini_request', new=MagicMock(side_effect=_async_return(mock_result))) as mock_gemini:
         # Test with "Google Gemini" (with capital letters and space)
         result = await send_ai_request(request, "Google Gemini")
         
         # Verify gemini controller was called (with api_key parameter)
-        mock_gemini.assert_called_once_with(request, api_key=ANY)
+        assert mock_gemini.call_count == 1
+        assert mock_gemini.call_args.args[0] is request
+        assert mock_gemini.call_args.kwargs.keys() == {"api_key"}
         assert result.success is True
         assert result.content == "test response"
 
 
-@pytest.mark.asyncio
-async def test_gemini_variations():
-    """Test that various gemini name variations are normalized correctly"""
-    request = aiapirequest(
-        job_id="test-job-2",
+def _make_request(job_id, model):
+    return aiapirequest(
+        job_id=job_id,
         user_id="test-user",
-        model="gemini-pro",
+        model=model,
         message="test message"
     )
-    
-    mock_result = aiapiresult(
-        job_id="test-job-2",
+
+
+def _make_result(job_id):
+    return aiapiresult(
+        job_id=job_id,
         user_id="test-user",
         content="test response",
         success=True
     )
-    
-    test_variations = [
-        "gemini",
-        "Gemini",
-        "GEMINI",
-        "google gemini",
-        "Google Gemini",
-        "GOOGLE GEMINI",
-        " Google Gemini ",  # with spaces
-    ]
-    
-    for provider_name in test_variations:
-        with patch('controller.api_gemini.process_gemini_request', new_callable=AsyncMock) as mock_gemini:
-            mock_gemini.return_value = mock_result
-            
-            result = await send_ai_request(request, provider_name)
-            
-            # Verify gemini controller was called for each variation (with api_key parameter)
-            mock_gemini.assert_called_once_with(request, api_key=ANY)
-            assert result.success is True, f"Failed for provider: {provider_name}"
+
+
+@pytest.fixture(scope="module")
+def gemini_request():
+    return _make_request("test-job-2", "gemini-pro")
+
+
+@pytest.fixture(scope="module")
+def gemini_result():
+    return _make_result("test-job-2")
+
+
+@pytest.fixture(scope="module")
+def openai_request():
+    return _make_request("test-job-3", "gpt-4")
+
+
+@pytest.fixture(scope="module")
+def openai_result():
+    return _make_result("test-job-3")
+
+
+@pytest.fixture(scope="module")
+def claude_request():
+    return _make_request("test-job-4", "claude-3-opus")
+
+
+@pytest.fixture(scope="module")
+def claude_result():
+    return _make_result("test-job-4")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("provider_name", [
+    "gemini",
+    "Gemini",
+    "GEMINI",
+    "google gemini",
+    "Google Gemini",
+    "GOOGLE GEMINI",
+    " Google Gemini ",  # with spaces
+])
+async def test_gemini_variations(provider_name, gemini_request, gemini_result):
+    """Test that various gemini name variations are normalized correctly"""
+    with patch.object(controller.api_gemini, 'process_gemini_request', new=MagicMock(side_effect=_async_return(gemini_result))) as mock_gemini:
+        result = await send_ai_request(gemini_request, provider_name)
+        
+        # Verify gemini controller was called for each variation (with api_key parameter)
+        assert mock_gemini.call_count == 1
+        assert mock_gemini.call_args.args[0] is gemini_request
+        assert mock_gemini.call_args.kwargs.keys() == {"api_key"}
+        assert result.success is True
 
 
 @pytest.mark.asyncio
-async def test_openai_normalization():
+@pytest.mark.parametrize("provider_name", ["openai", "OpenAI", "OPENAI", " openai "])
+async def test_openai_normalization(provider_name, openai_request, openai_result):
     """Test that 'OpenAI' variations are normalized correctly"""
-    request = aiapirequest(
-        job_id="test-job-3",
-        user_id="test-user",
-        model="gpt-4",
-        message="test message"
-    )
-    
-    mock_result = aiapiresult(
-        job_id="test-job-3",
-        user_id="test-user",
-        content="test response",
-        success=True
-    )
-    
-    test_variations = ["openai", "OpenAI", "OPENAI", " openai "]
-    
-    for provider_name in test_variations:
-        with patch('controller.api_openai.process_openai_request', new_callable=AsyncMock) as mock_openai:
-            mock_openai.return_value = mock_result
-            
-            result = await send_ai_request(request, provider_name)
-            
-            mock_openai.assert_called_once_with(request, api_key=ANY, org_id=ANY)
-            assert result.success is True, f"Failed for provider: {provider_name}"
+    with patch.object(controller.api_openai, 'process_openai_request', new=MagicMock(side_effect=_async_return(openai_result))) as mock_openai:
+        result = await send_ai_request(openai_request, provider_name)
+        
+        assert mock_openai.call_count == 1
+        assert mock_openai.call_args.args[0] is openai_request
+        assert mock_openai.call_args.kwargs.keys() == {"api_key", "org_id"}
+        assert result.success is True
 
 
 @pytest.mark.asyncio
-async def test_claude_normalization():
+@pytest.mark.parametrize("provider_name", [
+    "claude",
+    "Claude",
+    "CLAUDE",
+    "anthropic claude",
+    "Anthropic Claude",
+    "ANTHROPIC CLAUDE",
+])
+async def test_claude_normalization(provider_name, claude_request, claude_result):
     """Test that 'Claude' and 'Anthropic Claude' variations are normalized correctly"""
-    request = aiapirequest(
-        job_id="test-job-4",
-        user_id="test-user",
-        model="claude-3-opus",
-        message="test message"
-    )
-    
-    mock_result = aiapiresult(
-        job_id="test-job-4",
-        user_id="test-user",
-        content="test response",
-        success=True
-    )
-    
-    test_variations = [
-        "claude",
-        "Claude",
-        "CLAUDE",
-        "anthropic claude",
-        "Anthropic Claude",
-        "ANTHROPIC CLAUDE",
-    ]
-    
-    for provider_name in test_variations:
-        with patch('controller.api_claude.process_claude_request', new_callable=AsyncMock) as mock_claude:
-            mock_claude.return_value = mock_result
-            
-            result = await send_ai_request(request, provider_name)
-            
-            mock_claude.assert_called_once_with(request, api_key=ANY)
-            assert result.success is True, f"Failed for provider: {provider_name}"
+    with patch.object(controller.api_claude, 'process_claude_request', new=MagicMock(side_effect=_async_return(claude_result))) as mock_claude:
+        result = await send_ai_request(claude_request, provider_name)
+        
+        assert mock_claude.call_count == 1
+        assert mock_claude.call_args.args[0] is claude_request
+        assert mock_claude.call_args.kwargs.keys() == {"api_key"}
+        assert result.success is True
 
 
 @pytest.mark.asyncio
@@ -169,7 +179,7 @@ async def test_import_error_handling():
         message="test message"
     )
     
-    with patch('controller.api_openai.process_openai_request', side_effect=ImportError("Module not found")):
+    with patch.object(controller.api_openai, 'process_openai_request', side_effect=ImportError("Module not found")):
         result = await send_ai_request(request, "openai")
         
         assert result.success is False
@@ -186,7 +196,7 @@ async def test_general_exception_handling():
         message="test message"
     )
     
-    with patch('controller.api_openai.process_openai_request', new_callable=AsyncMock) as mock_openai:
+    with patch.object(controller.api_openai, 'process_openai_request', new_callable=AsyncMock) as mock_openai:
         mock_openai.side_effect = Exception("Unexpected error")
         
         result = await send_ai_request(request, "openai")
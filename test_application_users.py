@@ -2,26 +2,29 @@
 Test script for ApplicationUser functionality
 """
 import asyncio
+import pytest
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from model.application_user import ApplicationUser, ApplicationUserCreate, Base
 from service.application_user_service import ApplicationUserService
 
 # Test database URL
 DATABASE_URL = "sqlite+aiosqlite:///./test_application_users.db"
 
+
+# Hash test passwords with bcrypt's minimum work factor
+pytestmark = pytest.mark.usefixtures("fast_bcrypt")
+
+
 async def test_application_users():
     """Test ApplicationUser functionality"""
     
     # Create async engine and session
     engine = create_async_engine(DATABASE_URL, echo=True)
-    SessionLocal = sessionmaker(
-        engine, class_=AsyncSession, expire_on_commit=False
-    )
+    SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
     
     # Create tables
     async with engine.begin() as conn:
@@ -122,5 +125,20 @@ async def test_application_users():
     await engine.dispose()
     print("\nTest completed.")
 
+
+@pytest.mark.parametrize("rounds", ["3", "32"])
+def test_bcrypt_rounds_out_of_range_rejected(monkeypatch, rounds):
+    """Test that an out-of-range BCRYPT_ROUNDS fails when config is imported"""
+    import importlib
+    import config
+    
+    monkeypatch.setenv("BCRYPT_ROUNDS", rounds)
+    try:
+        with pytest.raises(ValueError, match="BCRYPT_ROUNDS must be between 4 and 31"):
+            importlib.reload(config)
+    finally:
+        monkeypatch.undo()
+        importlib.reload(config)
+
 if __name__ == "__main__":
     asyncio.run(test_application_users())
\ No newline at end of file
@@ -2,124 +2,98 @@
 Integration test for Claude API endpoint
 Tests the complete flow from HTTP request to controller response
 """
-import asyncio
 import httpx
 import logging
+import pytest
+import pytest_asyncio
 from model.aiapirequest import aiapirequest
 from model.aiapiresult import aiapiresult
+import controller.api_claude
+from controller.api_claude import process_claude_request
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Test data matching the aiapirequest model structure
+TEST_REQUEST = {
+    "job_id": "integration-test-job-456",
+    "user_id": "integration-test-user-789",
+    "model": "claude-3-sonnet-20240229",
+    "message": "Hello Claude, please respond with a greeting."
+}
 
-async def test_claude_integration():
-    """Test Claude API integration without real API key"""
-    print("Testing Claude API integration...\n")
+
+@pytest.fixture
+def no_anthropic_key(monkeypatch):
+    """Remove the Anthropic API key from the environment and module config"""
+    monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
+    monkeypatch.setattr(controller.api_claude, "ANTHROPIC_API_KEY", "")
+    monkeypatch.setattr(controller.api_claude, "_claude_controller", None)
+
+
+@pytest_asyncio.fixture(scope="session")
+async def http_client():
+    """In-process client that dispatches straight into the FastAPI app"""
+    from main import app
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture(scope="module")
+def empty_message_request():
+    return aiapirequest(
+        job_id="validation-test",
+        user_id="validation-user",
+        model="claude-3-sonnet-20240229",
+        message=""
+    )
+
+
+@pytest.fixture(scope="module")
+def empty_model_request():
+    return aiapirequest(
+        job_id="validation-test-2",
+        user_id="validation-user-2",
+        model="",
+        message="Valid message"
+    )
+
+
+async def test_claude_integration(no_anthropic_key):
+    """Test Claude controller directly (without HTTP layer) and without an API key"""
+    request = aiapirequest(**TEST_REQUEST)
     
-    # Test data matching the aiapirequest model structure
-    test_request = {
-        "job_id": "integration-test-job-456",
-        "user_id": "integration-test-user-789",
-        "model": "claude-3-sonnet-20240229",
-        "message": "Hello Claude, please respond with a greeting."
-    }
+    result = await process_claude_request(request)
     
-    # Test controller directly (without HTTP layer)
-    print("1. Testing controller directly...")
-    try:
-        from controller.api_claude import process_claude_request
-        
-        # Create aiapirequest object
-        request = aiapirequest(**test_request)
-        
-        # Process the request
-        result = await process_claude_request(request)
-        
-        # Validate the response structure
-        assert isinstance(result, aiapiresult), "Result should be aiapiresult instance"
-        assert result.job_id == test_request["job_id"], "job_id should be preserved"
-        assert result.user_id == test_request["user_id"], "user_id should be preserved"
-        assert isinstance(result.success, bool), "success should be boolean"
-        assert isinstance(result.content, str), "content should be string"
-        
-        if result.success:
-            print("   ✓ Request succeeded")
-            print(f"   ✓ Response content: {result.content[:100]}...")
-        else:
-            print(f"   ✓ Request failed as expected: {result.error_message}")
-            # We expect this to fail due to no API key being configured
-            assert "API key" in result.error_message or "authentication" in result.error_message.lower()
-            
-        print("   ✓ All response fields properly structured")
-        
-    except Exception as e:
-        print(f"   ❌ Controller test failed: {e}")
-        raise
+    # Validate the response structure
+    assert isinstance(result, aiapiresult), "Result should be aiapiresult instance"
+    assert result.job_id == TEST_REQUEST["job_id"], "job_id should be preserved"
+    assert result.user_id == TEST_REQUEST["user_id"], "user_id should be preserved"
+    assert isinstance(result.success, bool), "success should be boolean"
+    assert isinstance(result.content, str), "content should be string"
     
-    print("\n2. Testing model validation...")
-    try:
-        # Test with empty message
-        invalid_request = aiapirequest(
-            job_id="validation-test",
-            user_id="validation-user", 
-            model="claude-3-sonnet-20240229",
-            message=""
-        )
-        
-        result = await process_claude_request(invalid_request)
-        assert not result.success, "Empty message should cause failure"
-        assert "Message cannot be empty" in result.error_message, "Should validate empty message"
-        print("   ✓ Empty message validation works")
-        
-        # Test with empty model
-        invalid_request = aiapirequest(
-            job_id="validation-test-2",
-            user_id="validation-user-2",
-            model="",
-            message="Valid message"
-        )
-        
-        result = await process_claude_request(invalid_request)
-        assert not result.success, "Empty model should cause failure"
-        assert "Model cannot be empty" in result.error_message, "Should validate empty model"
-        print("   ✓ Empty model validation works")
-        
-    except Exception as e:
-        print(f"   ❌ Validation test failed: {e}")
-        raise
+    # We expect this to fail due to no API key being configured
+    assert not result.success
+    assert "API key" in result.error_message or "authentication" in result.error_message.lower()
+
+
+async def test_claude_integration_validation(no_anthropic_key, empty_message_request, empty_model_request):
+    """Test model validation through the controller entry point"""
+    # Test with empty message
+    result = await process_claude_request(empty_message_request)
+    assert not result.success, "Empty message should cause failure"
+    assert "Message cannot be empty" in result.error_message, "Should validate empty message"
     
-    print("\n3. Testing endpoint availability (without auth)...")
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "http://127.0.0.1:8000/api/claude",
-                json=test_request,
-                timeout=10.0
-            )
-            
-            # Should get 403 due to missing authentication
-            assert response.status_code == 403, f"Expected 403, got {response.status_code}"
-            print("   ✓ Endpoint correctly requires authentication")
-            
-    except httpx.ConnectError:
-        print("   ⚠ Server not running - endpoint test skipped")
-        print("   ℹ Start server with: python main.py")
-    except Exception as e:
-        print(f"   ❌ Endpoint test failed: {e}")
-        raise
+    # Test with empty model
+    result = await process_claude_request(empty_model_request)
+    assert not result.success, "Empty model should cause failure"
+    assert "Model cannot be empty" in result.error_message, "Should validate empty model"
+
+
+async def test_claude_endpoint_requires_auth(http_client):
+    """Test endpoint availability (without auth)"""
+    response = await http_client.post("/api/claude", json=TEST_REQUEST)
     
-    print("\n✅ All Claude integration tests passed!")
-    print("\n📋 Summary of implemented features:")
-    print("   • Claude API controller with async support")
-    print("   • Proper aiapirequest/aiapiresult object handling")
-    print("   • job_id and user_id preservation in responses")
-    print("   • success/error status handling")
-    print("   • Comprehensive input validation")
-    print("   • Error logging and handling")
-    print("   • HTTP endpoint with authentication")
-    print("   • Integration with FastAPI application")
-
-
-if __name__ == "__main__":
-    asyncio.run(test_claude_integration())
\ No newline at end of file
+    # Missing bearer credentials are rejected (403 on older FastAPI, 401 on newer)
+    assert response.status_code in (401, 403), f"Expected 401/403, got {response.status_code}"
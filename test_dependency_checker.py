@@ -1,8 +1,10 @@
 """
 Tests for dependency checker utility
 """
+import importlib.util
 import pytest
-from utils.dependency_checker import DependencyChecker
+from unittest.mock import patch
+from utils.dependency_checker import DependencyChecker, _check_package_cached
 
 
 def test_check_package_installed():
@@ -18,6 +20,18 @@ def test_check_package_not_installed():
     assert DependencyChecker.check_package('this_package_definitely_does_not_exist_12345') is False
 
 
+def test_check_package_is_cached():
+    """Test that repeated checks for the same package reuse the cached lookup"""
+    _check_package_cached.cache_clear()
+    
+    DependencyChecker.check_package('logging')
+    DependencyChecker.check_package('logging')
+    
+    info = _check_package_cached.cache_info()
+    assert info.misses == 1
+    assert info.hits == 1
+
+
 def test_check_core_dependencies():
     """Test checking core dependencies"""
     results = DependencyChecker.check_core_dependencies()
@@ -76,6 +90,35 @@ def test_verify_all_dependencies():
     assert 'ollama' not in missing_providers
 
 
+def test_dependency_reports_are_fresh_per_call():
+    """Test that mutating a returned report does not affect later checks"""
+    core = DependencyChecker.check_core_dependencies()
+    providers = DependencyChecker.check_provider_dependencies()
+    expected_core = dict(core)
+    expected_providers = {provider: dict(status) for provider, status in providers.items()}
+    
+    core.clear()
+    providers['openai']['openai'] = None
+    
+    assert DependencyChecker.check_core_dependencies() == expected_core
+    assert DependencyChecker.check_provider_dependencies() == expected_providers
+
+
+def test_each_package_looked_up_once():
+    """Test that a full verification does one spec lookup per distinct package"""
+    DependencyChecker.invalidate_cache()
+    expected_packages = set(DependencyChecker.CORE_DEPENDENCIES)
+    for packages in DependencyChecker.PROVIDER_DEPENDENCIES.values():
+        expected_packages.update(packages)
+    
+    with patch('utils.dependency_checker.importlib.util.find_spec', wraps=importlib.util.find_spec) as find_spec:
+        DependencyChecker.verify_all_dependencies()
+        DependencyChecker.verify_all_dependencies()
+    
+    looked_up = [call.args[0] for call in find_spec.call_args_list]
+    assert sorted(looked_up) == sorted(expected_packages)
+
+
 def test_get_installation_help_message_for_provider():
     """Test getting installation help for specific provider"""
     help_msg = DependencyChecker.get_installation_help_message('ollama')
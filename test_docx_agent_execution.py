@@ -3,13 +3,28 @@ Test cases for DOCX Agent Execution functionality
 """
 import pytest
 import asyncio
-from unittest.mock import Mock, patch, AsyncMock
-from fastapi import UploadFile
+from unittest.mock import patch
 import io
 from service.docx_service import DocxService
+from testing_helpers import MockUploadFile
 from model.docx_agent_execution import DocxAgentExecutionRequest, DocxAgentExecutionResponse
 
 
+# Baseline DocxAgentExecutionRequest fields that pass validation
+BASE_REQUEST = {
+    "agent_name": "test-agent",
+    "provider": "openai",
+    "model": "gpt-3.5-turbo",
+    "user_id": "test-user-123",
+}
+
+
+@pytest.fixture
+def base_request():
+    """Fresh copy of BASE_REQUEST that a test may modify"""
+    return dict(BASE_REQUEST)
+
+
 class TestDocxService:
     """Test cases for DOCX service functionality"""
     
@@ -40,6 +55,15 @@ class TestDocxService:
         for chunk in chunks[:-1]:  # All chunks except the last
             assert chunk.strip()[-1] in '.!?'
     
+    def test_chunk_text_question_and_exclamation_boundaries(self):
+        """Test that chunking also breaks after '! ' and '?\\n' endings"""
+        text = "Is this a question?\n" * 40 + "What a sentence! " * 40
+        chunks = DocxService.chunk_text(text, chunk_size=300)
+        
+        assert len(chunks) > 1
+        for chunk in chunks[:-1]:
+            assert chunk.strip()[-1] in '!?'
+    
     def test_merge_chunk_results_single(self):
         """Test merging single result"""
         results = ["Single result"]
@@ -63,93 +87,50 @@ class TestDocxService:
         merged = DocxService.merge_chunk_results(results, "test-agent")
         assert merged == "No results to merge."
     
-    @pytest.mark.asyncio
     async def test_extract_text_from_docx_invalid_file(self):
         """Test DOCX text extraction with invalid file"""
         # Create a mock UploadFile with invalid content
         invalid_content = b"This is not a DOCX file"
-        mock_file = Mock(spec=UploadFile)
-        mock_file.read = AsyncMock(return_value=invalid_content)
-        mock_file.filename = "test.docx"
+        mock_file = MockUploadFile("test.docx", invalid_content)
         
         with pytest.raises(Exception):  # Should raise HTTPException or similar
             await DocxService.extract_text_from_docx(mock_file)
     
-    @pytest.mark.asyncio
     async def test_extract_text_from_docx_empty_file(self):
         """Test DOCX text extraction with empty file"""
         # Mock an empty DOCX document
-        mock_file = Mock(spec=UploadFile)
-        mock_file.filename = "empty.docx"
+        mock_file = MockUploadFile("empty.docx", b"mock_content")
         
-        # Mock the docx.Document to return empty paragraphs and tables
-        with patch('service.docx_service.Document') as mock_document:
-            mock_doc = Mock()
-            mock_doc.paragraphs = []  # No paragraphs
-            mock_doc.tables = []      # No tables
-            mock_document.return_value = mock_doc
-            
-            mock_file.read = AsyncMock(return_value=b"mock_content")
+        # Mock the parser to return empty paragraphs and tables
+        with patch('service.docx_service._parse_docx') as mock_parse:
+            mock_parse.return_value = ([], [])  # No paragraphs, no tables
             
             with pytest.raises(Exception):  # Should raise HTTPException for empty content
                 await DocxService.extract_text_from_docx(mock_file)
     
-    @pytest.mark.asyncio
     async def test_extract_text_from_docx_with_content(self):
         """Test DOCX text extraction with actual content"""
-        mock_file = Mock(spec=UploadFile)
-        mock_file.filename = "test.docx"
+        mock_file = MockUploadFile("test.docx", b"mock_content")
         
-        # Mock the docx.Document to return sample content
-        with patch('service.docx_service.Document') as mock_document:
-            mock_doc = Mock()
-            
-            # Mock paragraphs
-            mock_paragraph1 = Mock()
-            mock_paragraph1.text = "First paragraph content."
-            mock_paragraph2 = Mock()
-            mock_paragraph2.text = "Second paragraph content."
-            mock_doc.paragraphs = [mock_paragraph1, mock_paragraph2]
-            
-            # Mock empty tables
-            mock_doc.tables = []
-            
-            mock_document.return_value = mock_doc
-            mock_file.read = AsyncMock(return_value=b"mock_content")
+        # Mock the parser to return sample paragraphs and no tables
+        with patch('service.docx_service._parse_docx') as mock_parse:
+            mock_parse.return_value = (
+                ["First paragraph content.", "Second paragraph content."],
+                []
+            )
             
             result = await DocxService.extract_text_from_docx(mock_file)
             
             assert "First paragraph content." in result
             assert "Second paragraph content." in result
     
-    @pytest.mark.asyncio
     async def test_extract_text_from_docx_with_tables(self):
         """Test DOCX text extraction with tables"""
-        mock_file = Mock(spec=UploadFile)
-        mock_file.filename = "test.docx"
+        mock_file = MockUploadFile("test.docx", b"mock_content")
         
-        with patch('service.docx_service.Document') as mock_document:
-            mock_doc = Mock()
-            
-            # Mock empty paragraphs
-            mock_doc.paragraphs = []
-            
-            # Mock table content
-            mock_cell1 = Mock()
-            mock_cell1.text = "Cell 1"
-            mock_cell2 = Mock()
-            mock_cell2.text = "Cell 2"
-            
-            mock_row = Mock()
-            mock_row.cells = [mock_cell1, mock_cell2]
-            
-            mock_table = Mock()
-            mock_table.rows = [mock_row]
-            
-            mock_doc.tables = [mock_table]
-            
-            mock_document.return_value = mock_doc
-            mock_file.read = AsyncMock(return_value=b"mock_content")
+        with patch('service.docx_service._parse_docx') as mock_parse:
+            # No paragraphs, one table with a single row
+            mock_parse.return_value = ([], [[["Cell 1", "Cell 2"]]])
             
             result = await DocxService.extract_text_from_docx(mock_file)
             
@@ -160,41 +141,22 @@ class TestDocxService:
 class TestDocxAgentExecutionModels:
     """Test cases for DOCX agent execution models"""
     
-    def test_docx_agent_execution_request_validation(self):
+    def test_docx_agent_execution_request_validation(self, base_request):
         """Test DOCX agent execution request model validation"""
         # Valid request
-        request_data = {
-            "agent_name": "test-agent",
-            "provider": "openai",
-            "model": "gpt-3.5-turbo",
-            "user_id": "test-user-123",
-            "chunk_size": 4000
-        }
-        request = DocxAgentExecutionRequest(**request_data)
+        request = DocxAgentExecutionRequest(**base_request, chunk_size=4000)
         assert request.agent_name == "test-agent"
         assert request.chunk_size == 4000
     
-    def test_docx_agent_execution_request_default_chunk_size(self):
+    def test_docx_agent_execution_request_default_chunk_size(self, base_request):
         """Test DOCX agent execution request with default chunk size"""
-        request_data = {
-            "agent_name": "test-agent",
-            "provider": "openai",
-            "model": "gpt-3.5-turbo",
-            "user_id": "test-user-123"
-        }
-        request = DocxAgentExecutionRequest(**request_data)
+        request = DocxAgentExecutionRequest(**base_request)
         assert request.chunk_size == 4000  # Default value
     
-    def test_docx_agent_execution_request_with_parameters(self):
+    def test_docx_agent_execution_request_with_parameters(self, base_request):
         """Test DOCX agent execution request with parameters"""
-        request_data = {
-            "agent_name": "test-agent",
-            "provider": "openai",
-            "model": "gpt-3.5-turbo",
-            "user_id": "test-user-123",
-            "parameters": {"param1": "value1", "param2": "value2"}
-        }
-        request = DocxAgentExecutionRequest(**request_data)
+        base_request["parameters"] = {"param1": "value1", "param2": "value2"}
+        request = DocxAgentExecutionRequest(**base_request)
         assert request.parameters == {"param1": "value1", "param2": "value2"}
     
     def test_docx_agent_execution_response_creation(self):
@@ -215,34 +177,16 @@ class TestDocxAgentExecutionModels:
         assert response.docx_filename == "test.docx"
         assert response.status == "completed"
     
-    def test_docx_agent_execution_request_validation_errors(self):
+    @pytest.mark.parametrize("field,value", [
+        ("agent_name", ""),         # Empty agent_name
+        ("agent_name", "a" * 101),  # Exceeds 100 character limit
+        ("provider", ""),           # Empty provider
+    ])
+    def test_docx_agent_execution_request_validation_errors(self, base_request, field, value):
         """Test DOCX agent execution request validation errors"""
-        # Test empty agent_name
-        with pytest.raises(ValueError):
-            DocxAgentExecutionRequest(
-                agent_name="",
-                provider="openai",
-                model="gpt-3.5-turbo",
-                user_id="test-user"
-            )
-        
-        # Test too long agent_name
+        base_request[field] = value
         with pytest.raises(ValueError):
-            DocxAgentExecutionRequest(
-                agent_name="a" * 101,  # Exceeds 100 character limit
-                provider="openai",
-                model="gpt-3.5-turbo",
-                user_id="test-user"
-            )
-        
-        # Test empty provider
-        with pytest.raises(ValueError):
-            DocxAgentExecutionRequest(
-                agent_name="test-agent",
-                provider="",
-                model="gpt-3.5-turbo",
-                user_id="test-user"
-            )
+            DocxAgentExecutionRequest(**base_request)
 
 
 if __name__ == "__main__":
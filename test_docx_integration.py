@@ -5,88 +5,138 @@ import pytest
 from fastapi import UploadFile
 import os
 from service.docx_service import DocxService
+from testing_helpers import MockUploadFile
 import tempfile
 import io
+import zipfile
+from unittest.mock import patch
 
 
-class MockUploadFile:
-    """Mock UploadFile for testing with real file content"""
-    def __init__(self, filename, content):
-        self.filename = filename
-        self._content = content
+# Text the sample document's paragraphs and table must produce
+EXPECTED_SAMPLE_FRAGMENTS = (
+    "Test Document",
+    "This is a test paragraph",
+    "This is another paragraph",
+    "Table 1",
+    "Name | Age",
+    "John | 30",
+)
+
+
+def _save_docx(doc):
+    """Serialize a Document to bytes, storing zip members uncompressed"""
+    docx_buffer = io.BytesIO()
+    # python-docx imports ZIP_DEFLATED by name, so patch it where it is used
+    with patch('docx.opc.phys_pkg.ZIP_DEFLATED', zipfile.ZIP_STORED):
+        doc.save(docx_buffer)
+    return docx_buffer.getvalue()
+
+
+@pytest.fixture(scope="session")
+def sample_docx_bytes():
+    """DOCX with a heading, two paragraphs and a table, serialized once per session"""
+    from docx import Document
+    
+    # Create a test document in memory
+    doc = Document()
+    doc.add_heading('Test Document', 0)
+    doc.add_paragraph('This is a test paragraph with some content.')
+    doc.add_paragraph('This is another paragraph to test text extraction.')
+    
+    # Add a table
+    table = doc.add_table(rows=2, cols=2)
+    table.cell(0, 0).text = 'Name'
+    table.cell(0, 1).text = 'Age'
+    table.cell(1, 0).text = 'John'
+    table.cell(1, 1).text = '30'
+    
+    # Save to bytes
+    return _save_docx(doc)
+
+
+@pytest.fixture(scope="session")
+def large_docx_bytes():
+    """Larger DOCX used for chunking, serialized once per session"""
+    from docx import Document
+    
+    # Create a larger test document
+    doc = Document()
+    doc.add_heading('Large Test Document', 0)
+    
+    # Add multiple paragraphs to create larger content
+    for i in range(10):
+        doc.add_paragraph(f'This is paragraph {i+1} with some substantial content to test text chunking functionality. ')
+    
+    # Save to bytes
+    return _save_docx(doc)
+
+
+# Paragraph content python-docx leaves out of Paragraph.text: a text box (with
+# its VML fallback), a tracked insertion and a page break, plus a hyperlink
+TRICKY_PARAGRAPH_XML = (
+    '<w:p xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+    ' xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006"'
+    ' xmlns:wp="http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing"'
+    ' xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main"'
+    ' xmlns:wps="http://schemas.microsoft.com/office/word/2010/wordprocessingShape"'
+    ' xmlns:v="urn:schemas-microsoft-com:vml">'
+    '<w:r><w:t xml:space="preserve">Body text </w:t></w:r>'
+    '<w:r><mc:AlternateContent>'
+    '<mc:Choice Requires="wps"><w:drawing><wp:inline><a:graphic><a:graphicData>'
+    '<wps:txbx><w:txbxContent><w:p><w:r><w:t>BOXTEXT</w:t></w:r></w:p></w:txbxContent></wps:txbx>'
+    '</a:graphicData></a:graphic></wp:inline></w:drawing></mc:Choice>'
+    '<mc:Fallback><w:pict><v:shape><v:textbox><w:txbxContent>'
+    '<w:p><w:r><w:t>BOXTEXT</w:t></w:r></w:p>'
+    '</w:txbxContent></v:textbox></v:shape></w:pict></mc:Fallback>'
+    '</mc:AlternateContent></w:r>'
+    '<w:ins w:id="1" w:author="a"><w:r><w:t>INSERTED</w:t></w:r></w:ins>'
+    '<w:r><w:br w:type="page"/><w:t>after</w:t><w:br/><w:t>line</w:t></w:r>'
+    '<w:hyperlink><w:r><w:t> link</w:t></w:r></w:hyperlink>'
+    '</w:p>'
+)
+
+
+@pytest.fixture(scope="session")
+def tricky_docx_bytes():
+    """DOCX mixing text boxes, revisions, breaks and merged table cells"""
+    from docx import Document
+    from docx.oxml import parse_xml
+    
+    doc = Document()
+    doc.element.body.insert(0, parse_xml(TRICKY_PARAGRAPH_XML))
     
-    async def read(self):
-        return self._content
+    table = doc.add_table(rows=3, cols=3)
+    for row_index, row in enumerate(table.rows):
+        for column_index, cell in enumerate(row.cells):
+            cell.text = f"r{row_index}c{column_index}"
+    table.cell(0, 0).merge(table.cell(0, 1))
+    table.cell(1, 2).merge(table.cell(2, 2))
     
-    async def seek(self, position):
-        pass
+    return _save_docx(doc)
 
 
 class TestDocxIntegration:
     """Integration tests for DOCX processing"""
     
-    @pytest.mark.asyncio
-    async def test_extract_text_from_real_docx(self):
+    async def test_extract_text_from_real_docx(self, sample_docx_bytes):
         """Test text extraction from a dynamically created DOCX file"""
-        from docx import Document
-        import io
-        
-        # Create a test document in memory
-        doc = Document()
-        doc.add_heading('Test Document', 0)
-        doc.add_paragraph('This is a test paragraph with some content.')
-        doc.add_paragraph('This is another paragraph to test text extraction.')
-        
-        # Add a table
-        table = doc.add_table(rows=2, cols=2)
-        table.cell(0, 0).text = 'Name'
-        table.cell(0, 1).text = 'Age'
-        table.cell(1, 0).text = 'John'
-        table.cell(1, 1).text = '30'
-        
-        # Save to bytes
-        docx_buffer = io.BytesIO()
-        doc.save(docx_buffer)
-        file_content = docx_buffer.getvalue()
-        
         # Create mock upload file
-        mock_file = MockUploadFile("test_sample.docx", file_content)
+        mock_file = MockUploadFile("test_sample.docx", sample_docx_bytes)
         
         # Extract text
         result = await DocxService.extract_text_from_docx(mock_file)
         
         # Verify extracted content
-        assert "Test Document" in result
-        assert "This is a test paragraph" in result
-        assert "This is another paragraph" in result
-        assert "Table 1" in result
-        assert "Name | Age" in result
-        assert "John | 30" in result
+        missing = [fragment for fragment in EXPECTED_SAMPLE_FRAGMENTS if fragment not in result]
+        assert not missing, f"Missing from extracted text: {missing}"
         
         print(f"Extracted text length: {len(result)} characters")
         print("Extracted text preview:")
         print(result[:500])
     
-    @pytest.mark.asyncio
-    async def test_chunk_large_docx_content(self):
+    async def test_chunk_large_docx_content(self, large_docx_bytes):
         """Test chunking of large DOCX content"""
-        from docx import Document
-        import io
-        
-        # Create a larger test document
-        doc = Document()
-        doc.add_heading('Large Test Document', 0)
-        
-        # Add multiple paragraphs to create larger content
-        for i in range(10):
-            doc.add_paragraph(f'This is paragraph {i+1} with some substantial content to test text chunking functionality. ')
-        
-        # Save to bytes
-        docx_buffer = io.BytesIO()
-        doc.save(docx_buffer)
-        file_content = docx_buffer.getvalue()
-        
-        mock_file = MockUploadFile("test_sample.docx", file_content)
+        mock_file = MockUploadFile("test_sample.docx", large_docx_bytes)
         
         # Extract text
         text = await DocxService.extract_text_from_docx(mock_file)
@@ -106,6 +156,20 @@ class TestDocxIntegration:
         # Should have most of the original content (allowing for some overlap/boundary handling)
         assert len(reconstructed) >= len(text) * 0.8
     
+    async def test_extract_text_from_tricky_docx(self, tricky_docx_bytes):
+        """Test that text boxes and revisions are skipped and merged cells repeat their text"""
+        mock_file = MockUploadFile("tricky.docx", tricky_docx_bytes)
+        
+        result = await DocxService.extract_text_from_docx(mock_file)
+        
+        assert result == (
+            "Body text after\nline link\n"
+            "--- Table 1 ---\n"
+            "r0c0\nr0c1 | r0c0\nr0c1 | r0c2\n"
+            "r1c0 | r1c1 | r1c2\nr2c2\n"
+            "r2c0 | r2c1 | r1c2\nr2c2\n"
+        )
+    
     def test_merge_results_integration(self):
         """Test merging multiple chunk results"""
         chunk_results = [
@@ -1,11 +1,11 @@
 """
 Test script for Gemini Controller functionality
 """
-import asyncio
 import logging
+from unittest.mock import MagicMock
+import controller.api_gemini
 from model.aiapirequest import aiapirequest
 from controller.api_gemini import process_gemini_request, GeminiController
-import os
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -14,87 +14,57 @@ logger = logging.getLogger(__name__)
 
 import pytest
 
-@pytest.mark.asyncio
-async def test_gemini_controller_without_api_key():
+# Request fields that pass validation; tests blank out one field at a time
+VALID_REQUEST_FIELDS = {
+    "job_id": "test-job-1",
+    "user_id": "test-user-1",
+    "model": "gemini-pro",
+    "message": "Test message",
+}
+
+
+@pytest.fixture(scope="module")
+def validation_controller():
+    """Controller built once with a fake key so validation logic is reachable"""
+    return GeminiController(strict_mode=False, api_key="fake-key-for-validation-test")
+
+
+async def test_gemini_controller_without_api_key(monkeypatch):
     """Test Gemini controller when no API key is configured"""
-    print("Testing Gemini controller without API key...")
-    
-    # Temporarily clear the API key
-    original_key = os.environ.get("GEMINI_API_KEY", "")
-    if "GEMINI_API_KEY" in os.environ:
-        del os.environ["GEMINI_API_KEY"]
+    # Clear the API key from the environment for this test only
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
     
-    try:
-        # This should raise an error about missing API key in strict mode
-        controller = GeminiController(strict_mode=True)
-        print("❌ Expected error for missing API key, but initialization succeeded")
-    except ValueError as e:
-        print(f"✓ Correctly caught missing API key error: {e}")
-    except Exception as e:
-        print(f"❌ Unexpected error: {e}")
-    finally:
-        # Restore the original key if it existed
-        if original_key:
-            os.environ["GEMINI_API_KEY"] = original_key
+    # This should raise an error about missing API key in strict mode
+    with pytest.raises(ValueError, match="API key"):
+        GeminiController(strict_mode=True)
 
 
-@pytest.mark.asyncio
-async def test_gemini_controller_validation():
+@pytest.mark.parametrize("field,value,expected_error", [
+    ("message", "", "Message cannot be empty"),
+    ("model", "", "Model cannot be empty"),
+])
+async def test_gemini_controller_validation(validation_controller, field, value, expected_error):
     """Test input validation in Gemini controller"""
-    print("\nTesting input validation...")
+    request = aiapirequest(**{**VALID_REQUEST_FIELDS, field: value})
     
-    # Set a fake API key so we can test validation logic  
-    original_key = os.environ.get("GEMINI_API_KEY", "")
-    os.environ["GEMINI_API_KEY"] = "fake-key-for-validation-test"
+    result = await validation_controller.process_request(request)
     
-    try:
-        # Test empty message - create controller with fake key to bypass config check
-        controller = GeminiController(strict_mode=False) 
-        
-        request = aiapirequest(
-            job_id="test-job-1",
-            user_id="test-user-1", 
-            model="gemini-pro",
-            message=""
-        )
-        
-        result = await controller.process_request(request)
-        
-        if not result.success and "empty" in result.error_message.lower():
-            print("✓ Correctly validated empty message")
-        else:
-            print(f"✓ Input validation working (got {result.error_message})")
-        
-        # Test empty model
-        request = aiapirequest(
-            job_id="test-job-2", 
-            user_id="test-user-1",
-            model="",
-            message="Test message"
-        )
-        
-        result = await controller.process_request(request)
-        
-        if not result.success and "empty" in result.error_message.lower():
-            print("✓ Correctly validated empty model")
-        else:
-            print(f"✓ Input validation working (got {result.error_message})")
-            
-    finally:
-        # Restore original key
-        if original_key:
-            os.environ["GEMINI_API_KEY"] = original_key
-        elif "GEMINI_API_KEY" in os.environ:
-            del os.environ["GEMINI_API_KEY"]
+    assert not result.success
+    assert expected_error in result.error_message
 
 
-@pytest.mark.asyncio
-async def test_gemini_controller_with_fake_key():
+async def test_gemini_controller_with_fake_key(monkeypatch):
     """Test Gemini controller with a fake API key (should fail authentication)"""
-    print("\nTesting Gemini controller with fake API key...")
+    # Set a fake API key and drop any cached controller so it is picked up
+    monkeypatch.setenv("GEMINI_API_KEY", "fake-api-key")
+    monkeypatch.setattr(controller.api_gemini, "_gemini_controller", None)
     
-    # Set a fake API key
-    os.environ["GEMINI_API_KEY"] = "fake-api-key"
+    # Stand in for the lazily loaded SDK so the rejected key never reaches the network
+    fake_genai = MagicMock()
+    fake_genai.GenerativeModel.return_value.generate_content.side_effect = Exception(
+        "403 Permission denied: API key not valid"
+    )
+    monkeypatch.setattr(controller.api_gemini, "genai", fake_genai)
     
     request = aiapirequest(
         job_id="test-job-3",
@@ -103,59 +73,28 @@ async def test_gemini_controller_with_fake_key():
         message="Hello, how are you?"
     )
     
-    try:
-        result = await process_gemini_request(request)
-        
-        if not result.success and "authentication" in result.error_message.lower():
-            print("✓ Correctly caught authentication error")
-        elif not result.success:
-            print(f"✓ Request failed as expected (likely auth error): {result.error_message}")
-        else:
-            print(f"❌ Expected authentication failure, but got success: {result}")
-    except Exception as e:
-        print(f"✓ Request failed as expected with exception: {e}")
+    result = await process_gemini_request(request)
+    
+    assert not result.success, f"Expected authentication failure, but got success: {result}"
+    assert result.error_message.startswith("Authentication error")
+    fake_genai.configure.assert_called_once_with(api_key="fake-api-key")
 
 
-@pytest.mark.asyncio
-async def test_model_validation():
+async def test_model_validation(monkeypatch):
     """Test that the request/response models work correctly"""
-    print("\nTesting model validation...")
+    # Run without a key so the request is answered locally instead of by the API
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    monkeypatch.setattr(controller.api_gemini, "_gemini_controller", None)
     
-    # Test aiapirequest model
-    try:
-        request = aiapirequest(
-            job_id="test-job-4",
-            user_id="test-user-1",
-            model="gemini-pro",
-            message="Test message"
-        )
-        print("✓ aiapirequest model validation works")
-    except Exception as e:
-        print(f"❌ aiapirequest model validation failed: {e}")
+    request = aiapirequest(
+        job_id="test-job-4",
+        user_id="test-user-1",
+        model="gemini-pro",
+        message="Test message"
+    )
     
     # Test that job_id and user_id are preserved
     result = await process_gemini_request(request)
     
-    if result.job_id == request.job_id and result.user_id == request.user_id:
-        print("✓ job_id and user_id preserved in response")
-    else:
-        print(f"❌ job_id/user_id not preserved. Expected {request.job_id}/{request.user_id}, got {result.job_id}/{result.user_id}")
-
-
-async def main():
-    """Run all tests"""
-    print("Starting Gemini Controller tests...\n")
-    
-    try:
-        await test_gemini_controller_without_api_key()
-        await test_gemini_controller_validation()
-        await test_gemini_controller_with_fake_key()
-        await test_model_validation()
-        
-        print("\n✓ All tests completed!")
-    except Exception as e:
-        print(f"\n❌ Test suite failed with error: {e}")
-
-
-if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    assert result.job_id == request.job_id
+    assert result.user_id == request.user_id
@@ -3,13 +3,16 @@ Test to verify that Gemini controller correctly uses API keys from Provider enti
 This test demonstrates the fix for the issue where Gemini was looking for API keys
 in environment variables instead of using the API key from the Provider database entity.
 """
-import pytest
-import os
+import config
+import google.generativeai as genai
+from model.aiapirequest import aiapirequest
+from model.provider import Provider
+from testing_helpers import mock_provider_db_session
+from service.ai_service import send_ai_request
 from controller.api_gemini import GeminiController, get_gemini_controller
 
 
-@pytest.mark.asyncio
-async def test_gemini_uses_provider_entity_api_key():
+def test_gemini_uses_provider_entity_api_key(monkeypatch):
     """
     Test that Gemini controller uses API key from Provider entity (passed as parameter)
     when no environment variable is set.
@@ -20,78 +23,108 @@ async def test_gemini_uses_provider_entity_api_key():
     - API key is passed to the controller as a parameter
     """
     # Clear environment to simulate the issue scenario
-    original_key = os.environ.get("GEMINI_API_KEY")
-    if "GEMINI_API_KEY" in os.environ:
-        del os.environ["GEMINI_API_KEY"]
-    
-    # Force reload config to ensure it's empty
-    import config
-    import importlib
-    importlib.reload(config)
-    
-    try:
-        # Verify config has empty key (simulating no env variable at startup)
-        assert config.GEMINI_API_KEY == "", f"Expected empty config key, got: {config.GEMINI_API_KEY}"
-        
-        # This is the key from the Provider entity database
-        provider_api_key = "sk-test-provider-entity-key-from-database"
-        
-        # Create controller with API key from Provider entity
-        # This is what ai_service.py does when it fetches the provider from database
-        controller = get_gemini_controller(api_key=provider_api_key)
-        
-        # Verify controller was created successfully
-        assert controller is not None
-        print("✓ Gemini controller successfully initialized with Provider entity API key")
-        
-        # The key point: there should be NO warning about "GEMINI_API_KEY not found"
-        # because we provided the api_key parameter from the Provider entity
-        
-    finally:
-        # Restore original environment
-        if original_key is not None:
-            os.environ["GEMINI_API_KEY"] = original_key
-        elif "GEMINI_API_KEY" in os.environ:
-            del os.environ["GEMINI_API_KEY"]
-        
-        # Reload config to restore original state
-        importlib.reload(config)
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    
+    # Verify config has empty key (simulating no env variable at startup)
+    assert config.GEMINI_API_KEY == "", f"Expected empty config key, got: {config.GEMINI_API_KEY}"
+    
+    # This is the key from the Provider entity database
+    provider_api_key = "sk-test-provider-entity-key-from-database"
+    
+    # Create controller with API key from Provider entity
+    # This is what ai_service.py does when it fetches the provider from database
+    controller = get_gemini_controller(api_key=provider_api_key)
+    
+    # Verify controller was created successfully
+    assert controller is not None
+    
+    # The key point: there should be NO warning about "GEMINI_API_KEY not found"
+    # because we provided the api_key parameter from the Provider entity
 
 
-@pytest.mark.asyncio
-async def test_gemini_provider_entity_takes_precedence():
+def test_gemini_provider_entity_takes_precedence(monkeypatch):
     """
     Test that Provider entity API key takes precedence over environment variable.
     """
     # Set environment variable
-    original_key = os.environ.get("GEMINI_API_KEY")
-    os.environ["GEMINI_API_KEY"] = "env-key-should-not-be-used"
-    
-    try:
-        # API key from Provider entity should take precedence
-        provider_api_key = "sk-provider-entity-key-takes-precedence"
-        
-        controller = get_gemini_controller(api_key=provider_api_key)
-        
-        # Controller should be initialized with Provider entity key, not env key
-        assert controller is not None
-        print("✓ Provider entity API key correctly takes precedence over environment variable")
-        
-    finally:
-        # Restore original environment
-        if original_key is not None:
-            os.environ["GEMINI_API_KEY"] = original_key
-        elif "GEMINI_API_KEY" in os.environ:
-            del os.environ["GEMINI_API_KEY"]
+    monkeypatch.setenv("GEMINI_API_KEY", "env-key-should-not-be-used")
+    
+    # API key from Provider entity should take precedence
+    provider_api_key = "sk-provider-entity-key-takes-precedence"
+    
+    controller = get_gemini_controller(api_key=provider_api_key)
+    
+    # Controller should be initialized with Provider entity key, not env key
+    assert controller is not None
 
 
-if __name__ == "__main__":
-    import asyncio
+async def test_gemini_error_message_when_no_api_key_anywhere(monkeypatch):
+    """Test that appropriate error is shown when no API key is available"""
+    
+    # Clear environment variable
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    
+    # Create a mock database session that returns no provider
+    mock_db = mock_provider_db_session(None)
+    
+    # Create a request
+    request = aiapirequest(
+        job_id="test-job-456",
+        user_id="test-user",
+        model="gemini-pro",
+        message="Test message"
+    )
+    
+    # Call send_ai_request - should fail gracefully
+    result = await send_ai_request(request, "gemini", db=mock_db)
+    
+    # Verify the result shows configuration error
+    assert result.success == False
+    assert "not configured" in result.error_message.lower()
+    assert result.job_id == request.job_id
+
+
+async def test_provider_precedence_order(mocker, monkeypatch):
+    """Test that API key sources are checked in correct order: parameter > environment > config"""
+    
+    # Set environment variable
+    monkeypatch.setenv("GEMINI_API_KEY", "env-var-key")
+    
+    # Create request
+    request = aiapirequest(
+        job_id="test-job-789",
+        user_id="test-user",
+        model="gemini-pro",
+        message="Test message"
+    )
+    
+    # Create mock DB with provider that has different API key
+    mock_provider = Provider(
+        id="test-id",
+        name="Gemini",
+        provider_type="gemini",
+        api_key="database-key",  # This should take precedence
+        is_active=True
+    )
+    mock_db = mock_provider_db_session(mock_provider)
+    
+    # Mock the Gemini API with a plain-text reply
+    mock_model_class = mocker.patch.object(genai, "GenerativeModel")
+    mock_configure = mocker.patch.object(genai, "configure")
+    mock_response = mock_model_class.return_value.generate_content.return_value
+    mock_response.text = "Test response from Gemini"
+    mock_response.usage_metadata = None
+    
+    # Call send_ai_request
+    result = await send_ai_request(request, "gemini", db=mock_db)
     
-    async def run_tests():
-        print("\nTesting Gemini Provider Entity Fix...\n")
-        await test_gemini_uses_provider_entity_api_key()
-        await test_gemini_provider_entity_takes_precedence()
-        print("\n✓ All Provider entity tests passed!")
+    # Verify the database key was used (not the env var)
+    mock_configure.assert_called()
+    call_args = mock_configure.call_args
+    assert call_args[1]['api_key'] == "database-key"
     
-    asyncio.run(run_tests())
+    # Verify the request went through the Gemini provider and succeeded
+    mock_model_class.assert_called_with(request.model)
+    assert result.success is True
+    assert result.content == "Test response from Gemini"
+    assert result.job_id == request.job_id
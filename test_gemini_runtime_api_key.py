@@ -4,129 +4,79 @@ This test specifically verifies the fix for the issue where API keys
 from the database (passed as parameters) were not being used correctly.
 """
 import pytest
-import os
+import config
 from controller.api_gemini import GeminiController
+from controller.api_claude import ClaudeController
+from controller.api_openai import OpenAIController
 
 
-@pytest.mark.asyncio
-async def test_gemini_runtime_environment_variable():
+@pytest.fixture(scope="module")
+def controller_factory():
+    """Build non-strict controllers with an explicit key, once per (class, key) per module"""
+    controllers = {}
+    
+    def make(controller_cls, api_key):
+        if (controller_cls, api_key) not in controllers:
+            controllers[(controller_cls, api_key)] = controller_cls(strict_mode=False, api_key=api_key)
+        return controllers[(controller_cls, api_key)]
+    
+    return make
+
+
+def test_gemini_runtime_environment_variable(monkeypatch):
     """Test that Gemini controller checks runtime environment variable"""
     # Clear any existing environment variable
-    original_key = os.environ.get("GEMINI_API_KEY")
-    if "GEMINI_API_KEY" in os.environ:
-        del os.environ["GEMINI_API_KEY"]
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    
+    # Verify config has empty key
+    assert config.GEMINI_API_KEY == "", f"Expected empty config key, got: {config.GEMINI_API_KEY}"
+    
+    # Now set environment variable at runtime (simulating what would happen
+    # if the database provider API key is passed)
+    test_key = "runtime-test-key-from-database"
+    monkeypatch.setenv("GEMINI_API_KEY", test_key)
     
-    # Force reload of config module to ensure GEMINI_API_KEY from config is empty
-    import config
-    import importlib
-    importlib.reload(config)
+    # Controller should pick up the runtime environment variable
+    # even though config.GEMINI_API_KEY is empty
+    controller = GeminiController(strict_mode=False)
     
-    try:
-        # Verify config has empty key
-        assert config.GEMINI_API_KEY == "", f"Expected empty config key, got: {config.GEMINI_API_KEY}"
-        
-        # Now set environment variable at runtime (simulating what would happen
-        # if the database provider API key is passed)
-        test_key = "runtime-test-key-from-database"
-        os.environ["GEMINI_API_KEY"] = test_key
-        
-        # Controller should pick up the runtime environment variable
-        # even though config.GEMINI_API_KEY is empty
-        controller = GeminiController(strict_mode=False)
-        
-        # The controller should have attempted initialization with the runtime key
-        # We can't verify the exact behavior without mocking genai, but the
-        # controller should not be None
-        assert controller is not None
-        print("✓ Gemini controller correctly checks runtime environment variable")
-        
-    finally:
-        # Restore original environment
-        if original_key is not None:
-            os.environ["GEMINI_API_KEY"] = original_key
-        elif "GEMINI_API_KEY" in os.environ:
-            del os.environ["GEMINI_API_KEY"]
-        
-        # Reload config to restore original state
-        importlib.reload(config)
+    # The controller should have attempted initialization with the runtime key
+    # We can't verify the exact behavior without mocking genai, but the
+    # controller should not be None
+    assert controller is not None
 
 
-@pytest.mark.asyncio
-async def test_gemini_api_key_parameter_priority():
+def test_gemini_api_key_parameter_priority(monkeypatch, controller_factory):
     """Test that API key parameter takes priority over environment and config"""
     # Set environment variable
-    original_key = os.environ.get("GEMINI_API_KEY")
-    os.environ["GEMINI_API_KEY"] = "env-key"
+    monkeypatch.setenv("GEMINI_API_KEY", "env-key")
     
-    try:
-        # Pass explicit API key - should take priority
-        test_key = "explicit-api-key-from-database"
-        controller = GeminiController(strict_mode=False, api_key=test_key)
-        
-        # Controller should be initialized
-        assert controller is not None
-        print("✓ Gemini controller correctly prioritizes explicit API key parameter")
-        
-    finally:
-        # Restore original environment
-        if original_key is not None:
-            os.environ["GEMINI_API_KEY"] = original_key
-        elif "GEMINI_API_KEY" in os.environ:
-            del os.environ["GEMINI_API_KEY"]
+    # Pass explicit API key - should take priority
+    test_key = "explicit-api-key-from-database"
+    controller = controller_factory(GeminiController, test_key)
+    
+    # Controller should be initialized
+    assert controller is not None
 
 
-@pytest.mark.asyncio
-async def test_gemini_consistency_with_other_controllers():
+def test_gemini_consistency_with_other_controllers(monkeypatch, controller_factory):
     """Test that Gemini behaves like Claude and OpenAI controllers"""
-    from controller.api_claude import ClaudeController
-    from controller.api_openai import OpenAIController
-    
     # Clear all environment variables
-    gemini_orig = os.environ.get("GEMINI_API_KEY")
-    claude_orig = os.environ.get("ANTHROPIC_API_KEY")
-    openai_orig = os.environ.get("OPENAI_API_KEY")
-    
     for key in ["GEMINI_API_KEY", "ANTHROPIC_API_KEY", "OPENAI_API_KEY"]:
-        if key in os.environ:
-            del os.environ[key]
+        monkeypatch.delenv(key, raising=False)
     
-    try:
-        # All controllers should behave the same with explicit API keys
-        test_key = "test-key-from-database"
-        
-        gemini_controller = GeminiController(strict_mode=False, api_key=test_key)
-        claude_controller = ClaudeController(strict_mode=False, api_key=test_key)
-        openai_controller = OpenAIController(strict_mode=False, api_key=test_key)
-        
-        # All should be initialized
-        assert gemini_controller is not None
-        assert claude_controller is not None
-        assert openai_controller is not None
-        
-        # Claude and OpenAI store the key, let's verify they got the right key
-        assert claude_controller.api_key == test_key
-        assert openai_controller.api_key == test_key
-        
-        print("✓ All controllers behave consistently with database API keys")
-        
-    finally:
-        # Restore original environment
-        if gemini_orig is not None:
-            os.environ["GEMINI_API_KEY"] = gemini_orig
-        if claude_orig is not None:
-            os.environ["ANTHROPIC_API_KEY"] = claude_orig
-        if openai_orig is not None:
-            os.environ["OPENAI_API_KEY"] = openai_orig
-
-
-if __name__ == "__main__":
-    import asyncio
+    # All controllers should behave the same with explicit API keys
+    test_key = "test-key-from-database"
+    
+    gemini_controller = controller_factory(GeminiController, test_key)
+    claude_controller = controller_factory(ClaudeController, test_key)
+    openai_controller = controller_factory(OpenAIController, test_key)
     
-    async def run_tests():
-        print("\nTesting Gemini Runtime API Key Handling...\n")
-        await test_gemini_runtime_environment_variable()
-        await test_gemini_api_key_parameter_priority()
-        await test_gemini_consistency_with_other_controllers()
-        print("\n✓ All runtime API key tests passed!")
+    # All should be initialized
+    assert gemini_controller is not None
+    assert claude_controller is not None
+    assert openai_controller is not None
     
-    asyncio.run(run_tests())
+    # Claude and OpenAI store the key, let's verify they got the right key
+    assert claude_controller.api_key == test_key
+    assert openai_controller.api_key == test_key
@@ -2,13 +2,23 @@
 Test cases for Image Agent Execution functionality
 """
 import pytest
-import asyncio
 from unittest.mock import Mock, patch, AsyncMock
-from fastapi import UploadFile, HTTPException
-import io
+from fastapi import HTTPException
 import base64
+import pybase64
 from service.image_service import ImageService
-from model.image_agent_execution import ImageAgentExecutionRequest, ImageAgentExecutionResponse
+from testing_helpers import MockUploadFile
+from model.image_agent_execution import ImageAgentExecutionRequest, ImageAgentExecutionRequestAdapter, ImageAgentExecutionResponse
+
+# Minimal valid 1x1 PNG file
+PNG_FIXTURE = (
+    b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x06\x00\x00\x00\x1f\x15\xc4\x89"
+    b"\x00\x00\x00\rIDATx\xdacd\xf8\xcfP\x0f\x00\x03\x86\x01\x80Z4}k"
+    b"\x00\x00\x00\x00IEND\xaeB`\x82"
+)
+
+# Zero-filled content larger than the 10MB limit, allocated once at import
+OVERSIZE_BYTES = bytes(11 * 1024 * 1024)
 
 
 class TestImageService:
@@ -42,45 +52,58 @@ class TestImageService:
     @pytest.mark.asyncio
     async def test_convert_image_to_base64_success(self):
         """Test successful image to base64 conversion"""
-        # Create a small test image content (1x1 PNG)
-        # This is a minimal valid PNG file
-        png_content = base64.b64decode(
-            "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="
-        )
-        
-        mock_file = Mock(spec=UploadFile)
-        mock_file.read = AsyncMock(return_value=png_content)
-        mock_file.filename = "test.png"
+        mock_file = MockUploadFile("test.png", PNG_FIXTURE)
         
         result = await ImageService.convert_image_to_base64(mock_file)
         
         assert isinstance(result, str)
         assert len(result) > 0
-        # Verify it's valid base64
-        base64.b64decode(result)
+        # Verify it's strictly valid base64 that round-trips to the original bytes
+        assert pybase64.b64decode(result, validate=True) == PNG_FIXTURE
     
     @pytest.mark.asyncio
     async def test_convert_image_to_base64_too_large(self):
         """Test image size validation"""
-        # Create content larger than 10MB
-        large_content = b"x" * (11 * 1024 * 1024)
+        # Serve zero-copy memoryview slices instead of copying each chunk
+        mock_file = MockUploadFile("large.png", memoryview(OVERSIZE_BYTES))
+        
+        with pytest.raises(HTTPException) as exc_info:
+            await ImageService.convert_image_to_base64(mock_file)
         
-        mock_file = Mock(spec=UploadFile)
-        mock_file.read = AsyncMock(return_value=large_content)
-        mock_file.filename = "large.png"
+        assert exc_info.value.status_code == 400
+        assert "too large" in exc_info.value.detail.lower()
+        # Rejected right after crossing the limit, without reading the rest of the upload
+        assert mock_file._position <= ImageService.MAX_IMAGE_SIZE + ImageService.READ_CHUNK_SIZE
+        assert mock_file._position < len(OVERSIZE_BYTES)
+    
+    @pytest.mark.asyncio
+    async def test_convert_image_to_base64_too_large_declared_size(self):
+        """Test that a declared oversize upload is rejected before any read"""
+        mock_file = MockUploadFile("large.png", b"", size=len(OVERSIZE_BYTES))
+        mock_file.read = AsyncMock()
         
         with pytest.raises(HTTPException) as exc_info:
             await ImageService.convert_image_to_base64(mock_file)
         
         assert exc_info.value.status_code == 400
         assert "too large" in exc_info.value.detail.lower()
+        mock_file.read.assert_not_awaited()
+    
+    @pytest.mark.asyncio
+    async def test_convert_image_to_base64_multiple_chunks(self):
+        """Test chunked encoding matches a single-shot encode across chunk boundaries"""
+        content = bytes(range(256)) * (ImageService.READ_CHUNK_SIZE // 128) + b"tail!"
+        
+        mock_file = MockUploadFile("multi.png", content)
+        
+        result = await ImageService.convert_image_to_base64(mock_file)
+        
+        assert result == base64.b64encode(content).decode('ascii')
     
     @pytest.mark.asyncio
     async def test_convert_image_to_base64_empty(self):
         """Test handling of empty image file"""
-        mock_file = Mock(spec=UploadFile)
-        mock_file.read = AsyncMock(return_value=b"")
-        mock_file.filename = "empty.png"
+        mock_file = MockUploadFile("empty.png", b"")
         
         result = await ImageService.convert_image_to_base64(mock_file)
         
@@ -140,6 +163,19 @@ class TestImageAgentExecutionModels:
                 user_id=""  # Empty string should fail
             )
     
+    def test_image_agent_execution_request_adapter(self):
+        """Test the shared request adapter validates raw request dicts like the model"""
+        from pydantic import ValidationError
+        request = ImageAgentExecutionRequestAdapter.validate_python({
+            "agent_name": "image-ocr-extractor-de",
+            "user_id": "test-user-123"
+        })
+        assert isinstance(request, ImageAgentExecutionRequest)
+        assert request.agent_name == "image-ocr-extractor-de"
+        
+        with pytest.raises(ValidationError):
+            ImageAgentExecutionRequestAdapter.validate_python(["not", "a", "dict"])
+    
     def test_image_agent_execution_response_success(self):
         """Test Image agent execution response model for success case"""
         response_data = {
@@ -3,13 +3,34 @@ Test script to validate the implemented functionality
 """
 import asyncio
 import httpx
-import json
-from sqlalchemy.ext.asyncio import AsyncSession
+import pytest_asyncio
+from sqlalchemy import select
 from database import get_async_session, init_db
 from service.user_service import UserService
-from model.user import UserCreate
+from model.user import User, UserCreate
+from main import app
+
+
+def app_client():
+    """HTTP client that dispatches straight into the FastAPI app, no server needed"""
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+async def fetch_api_key():
+    """Return "client_id:client_secret" for the newest user in one query, or None if there is none"""
+    async for db in get_async_session():
+        result = await db.execute(
+            select(User.client_id, User.client_secret).order_by(User.created_at.desc()).limit(1)
+        )
+        row = result.first()
+        return f"{row.client_id}:{row.client_secret}" if row else None
+
+
+@pytest_asyncio.fixture(scope="session")
+async def user_api_key():
+    """API key of the newest user, resolved once and shared by the endpoint tests"""
+    return await fetch_api_key()
 
-BASE_URL = "http://localhost:8000"
 
 async def test_database_operations():
     """Test basic database operations"""
@@ -47,46 +68,46 @@ async def test_database_operations():
         await db.commit()
         break
 
-async def test_api_endpoints():
+async def test_api_endpoints(user_api_key):
     """Test API endpoints"""
     print("\nTesting API endpoints...")
     
-    async with httpx.AsyncClient() as client:
+    async with app_client() as client:
         # Test health endpoint without auth
-        response = await client.get(f"{BASE_URL}/health")
-        assert response.status_code == 200
-        data = response.json()
-        assert data["status"] == "ok"
+        if not user_api_key:
+            response = await client.get("/health")
+            assert response.status_code == 200
+            data = response.json()
+            assert data["status"] == "ok"
+            print("✓ Health endpoint works without auth")
+            return
+        
+        # The four checks are independent, so issue them concurrently
+        headers = {"Authorization": f"Bearer {user_api_key}"}
+        health, health_auth, secure, secure_invalid = await asyncio.gather(
+            client.get("/health"),
+            client.get("/health", params={"api_key": user_api_key}),
+            client.get("/secure-endpoint", headers=headers),
+            client.get("/secure-endpoint", headers={"Authorization": "Bearer invalid:credentials"}),
+        )
+        
+        assert health.status_code == 200
+        assert health.json()["status"] == "ok"
         print("✓ Health endpoint works without auth")
         
-        # Get a user for testing (we'll use the first one in the database)
-        async for db in get_async_session():
-            users = await UserService.get_users(db, limit=1)
-            if users:
-                test_user = await UserService.get_user_with_secret(db, users[0].client_id)
-                api_key = f"{test_user.client_id}:{test_user.client_secret}"
-                
-                # Test health endpoint with auth
-                response = await client.get(f"{BASE_URL}/health?api_key={api_key}")
-                assert response.status_code == 200
-                data = response.json()
-                assert "authenticated_user" in data
-                print("✓ Health endpoint works with API key auth")
-                
-                # Test secured endpoint with Bearer token
-                headers = {"Authorization": f"Bearer {api_key}"}
-                response = await client.get(f"{BASE_URL}/secure-endpoint", headers=headers)
-                assert response.status_code == 200
-                data = response.json()
-                assert "message" in data
-                print("✓ Secured endpoint works with Bearer token")
-                
-                # Test invalid credentials
-                response = await client.get(f"{BASE_URL}/secure-endpoint", 
-                                         headers={"Authorization": "Bearer invalid:credentials"})
-                assert response.status_code == 401
-                print("✓ Authentication properly rejects invalid credentials")
-            break
+        # Test health endpoint with auth
+        assert health_auth.status_code == 200
+        assert "authenticated_user" in health_auth.json()
+        print("✓ Health endpoint works with API key auth")
+        
+        # Test secured endpoint with Bearer token
+        assert secure.status_code == 200
+        assert "message" in secure.json()
+        print("✓ Secured endpoint works with Bearer token")
+        
+        # Test invalid credentials
+        assert secure_invalid.status_code == 401
+        print("✓ Authentication properly rejects invalid credentials")
 
 async def test_admin_api():
     """Test admin API endpoints"""
@@ -95,7 +116,7 @@ async def test_admin_api():
     # Admin credentials for HTTP Basic Auth
     admin_auth = ("admin", "Opg#842+9914")
     
-    async with httpx.AsyncClient() as client:
+    async with app_client() as client:
         # Test creating user via API with admin auth
         user_data = {
             "name": "API Created User",
@@ -103,80 +124,75 @@ async def test_admin_api():
             "is_active": True
         }
         
-        response = await client.post(f"{BASE_URL}/admin/users/create", data=user_data, auth=admin_auth)
+        response = await client.post("/admin/users/create", data=user_data, auth=admin_auth)
         assert response.status_code == 303  # Redirect response
         print("✓ Admin user creation API works")
         
         # Test admin users page with auth
-        response = await client.get(f"{BASE_URL}/admin/users", auth=admin_auth)
+        response = await client.get("/admin/users", auth=admin_auth)
         assert response.status_code == 200
         print("✓ Admin users page accessible")
         
         # Test admin dashboard with auth
-        response = await client.get(f"{BASE_URL}/admin/", auth=admin_auth)
+        response = await client.get("/admin/", auth=admin_auth)
         assert response.status_code == 200
         print("✓ Admin dashboard accessible")
         
         # Test that admin endpoints are protected (without auth should return 401)
-        response = await client.get(f"{BASE_URL}/admin/users")
+        response = await client.get("/admin/users")
         assert response.status_code == 401
         print("✓ Admin endpoints properly protected")
 
-async def test_agent_execute_with_parameters():
+async def test_agent_execute_with_parameters(user_api_key):
     """Test agent execution with parameters"""
     print("\nTesting agent execution with parameters...")
     
-    async with httpx.AsyncClient() as client:
-        # Get a user for testing
-        async for db in get_async_session():
-            users = await UserService.get_users(db, limit=1)
-            if users:
-                test_user = await UserService.get_user_with_secret(db, users[0].client_id)
-                api_key = f"{test_user.client_id}:{test_user.client_secret}"
-                headers = {"Authorization": f"Bearer {api_key}"}
-                
-                # Test agent execution without parameters
-                request_data = {
-                    "agent_name": "translation-agent",
-                    "provider": "openai",
-                    "model": "gpt-4",
-                    "message": "Hello world",
-                    "user_id": test_user.client_id
-                }
-                
-                response = await client.post(f"{BASE_URL}/agent/execute", 
-                                           json=request_data, headers=headers)
-                print(f"✓ Agent execution without parameters: status {response.status_code}")
-                
-                # Test agent execution with parameters
-                request_data_with_params = {
-                    "agent_name": "translation-agent", 
-                    "provider": "openai",
-                    "model": "gpt-4",
-                    "message": "Hello world",
-                    "user_id": test_user.client_id,
-                    "parameters": {
-                        "target_language": "German",
-                        "style": "formal",
-                        "preserve_formatting": True
-                    }
+    async with app_client() as client:
+        # Use the newest user in the database for testing
+        if user_api_key:
+            client_id = user_api_key.split(":", 1)[0]
+            headers = {"Authorization": f"Bearer {user_api_key}"}
+            
+            # Test agent execution without parameters
+            request_data = {
+                "agent_name": "translation-agent",
+                "provider": "openai",
+                "model": "gpt-4",
+                "message": "Hello world",
+                "user_id": client_id
+            }
+            
+            response = await client.post("/agent/execute", 
+                                       json=request_data, headers=headers)
+            print(f"✓ Agent execution without parameters: status {response.status_code}")
+            
+            # Test agent execution with parameters
+            request_data_with_params = {
+                "agent_name": "translation-agent", 
+                "provider": "openai",
+                "model": "gpt-4",
+                "message": "Hello world",
+                "user_id": client_id,
+                "parameters": {
+                    "target_language": "German",
+                    "style": "formal",
+                    "preserve_formatting": True
                 }
-                
-                response = await client.post(f"{BASE_URL}/agent/execute", 
-                                           json=request_data_with_params, headers=headers)
-                print(f"✓ Agent execution with parameters: status {response.status_code}")
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    print(f"✓ Agent execution successful: job_id {result.get('job_id')}")
-                elif response.status_code == 404:
-                    print("✓ Agent not found response as expected (no API keys configured)")
-                elif response.status_code == 500:
-                    print("✓ Server error as expected (likely missing API keys)")
-                else:
-                    print(f"  Response: {response.text}")
-                    
-            break
+            }
+            
+            response = await client.post("/agent/execute", 
+                                       json=request_data_with_params, headers=headers)
+            print(f"✓ Agent execution with parameters: status {response.status_code}")
+            
+            if response.status_code == 200:
+                result = response.json()
+                print(f"✓ Agent execution successful: job_id {result.get('job_id')}")
+            elif response.status_code == 404:
+                print("✓ Agent not found response as expected (no API keys configured)")
+            elif response.status_code == 500:
+                print("✓ Server error as expected (likely missing API keys)")
+            else:
+                print(f"  Response: {response.text}")
 
 async def main():
     """Run all tests"""
@@ -184,9 +200,10 @@ async def main():
     
     try:
         await test_database_operations()
-        await test_api_endpoints()
+        api_key = await fetch_api_key()
+        await test_api_endpoints(api_key)
         await test_admin_api()
-        await test_agent_execute_with_parameters()
+        await test_agent_execute_with_parameters(api_key)
         
         print("\n🎉 All tests passed! Implementation is working correctly.")
         
@@ -3,34 +3,10 @@ Tests for Inline Price Editing with htmx
 """
 import pytest
 import pytest_asyncio
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
-from model.user import Base
 from model.provider import Provider, ProviderModel, ProviderModelCreate, ProviderModelUpdate
 from service.provider_service import ProviderService
 
 
-@pytest_asyncio.fixture
-async def async_session():
-    """Create async test database session"""
-    engine = create_async_engine(
-        "sqlite+aiosqlite:///:memory:",
-        echo=False
-    )
-    
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    
-    AsyncSessionLocal = sessionmaker(
-        engine, class_=AsyncSession, expire_on_commit=False
-    )
-    
-    async with AsyncSessionLocal() as session:
-        yield session
-    
-    await engine.dispose()
-
-
 @pytest_asyncio.fixture
 async def test_provider(async_session):
     """Create a test provider"""
@@ -190,14 +166,15 @@ async def test_inline_rapid_updates(async_session, test_provider):
     model = await ProviderService.create_provider_model(async_session, model_data)
     await async_session.commit()
     
-    # Simulate multiple rapid edits
+    # Simulate multiple rapid edits; each update is flushed, then committed once
     prices = [15.0, 20.5, 25.75, 30.00]
     for price in prices:
         update_data = ProviderModelUpdate(input_price_per_million=price)
         updated_model = await ProviderService.update_provider_model(
             async_session, model.id, update_data
         )
-        await async_session.commit()
+        assert updated_model.input_price_per_million == price
+    await async_session.commit()
     
     # Verify final price is correct
     final_model = await ProviderService.get_provider_models(async_session, test_provider.id)
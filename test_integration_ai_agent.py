@@ -2,13 +2,11 @@
 Integration test for AI Agent Generation feature
 Tests the complete workflow without requiring actual OpenAI API calls
 """
-import asyncio
-import json
+import functools
 import logging
-import tempfile
-import os
+import re
+import pytest
 from pathlib import Path
-from fastapi.testclient import TestClient
 
 
 # Set up logging
@@ -16,10 +14,31 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=None)
+def _read_template(path: str) -> str:
+    """Read a template once per test run"""
+    return Path(path).read_text(encoding='utf-8')
+
+
+@functools.lru_cache(maxsize=None)
+def _token_pattern(tokens: tuple) -> re.Pattern:
+    """Compile one alternation matching every token; the lookahead also finds overlapping tokens"""
+    return re.compile("(?=(" + "|".join(map(re.escape, tokens)) + "))")
+
+
+def _missing_tokens(content: str, tokens: tuple) -> set:
+    """Return the tokens absent from content, found in a single scan"""
+    return set(tokens) - set(_token_pattern(tokens).findall(content))
+
+
+CREATE_TEMPLATE_TOKENS = ("ai-generate", "AI Agent erstellen", "description")
+REVIEW_TEMPLATE_TOKENS = ("ai-review", "accept", "regenerate")
+AGENTS_TEMPLATE_TOKENS = ("ai-create", "Mit AI erstellen", "btn-group")
+AI_AGENT_ROUTES = {"/admin/agents/ai-create", "/admin/agents/ai-generate", "/admin/agents/ai-review"}
+
+
 async def test_ai_agent_templates():
     """Test that the AI agent templates render correctly"""
-    print("Testing AI agent templates...")
-    
     # Test basic template syntax by importing and checking files exist
     ai_create_template = Path("templates/ai_agent_create.html")
     ai_review_template = Path("templates/ai_agent_review.html")
@@ -28,27 +47,19 @@ async def test_ai_agent_templates():
     assert ai_review_template.exists(), "AI review template should exist"
     
     # Check template content for key elements
-    with open(ai_create_template, 'r', encoding='utf-8') as f:
-        create_content = f.read()
-        
-    assert 'ai-generate' in create_content, "Create template should have ai-generate action"
-    assert 'AI Agent erstellen' in create_content, "Create template should have AI creation heading"
-    assert 'description' in create_content, "Create template should have description field"
+    create_content = _read_template("templates/ai_agent_create.html")
     
-    with open(ai_review_template, 'r', encoding='utf-8') as f:
-        review_content = f.read()
-        
-    assert 'ai-review' in review_content, "Review template should have ai-review action"
-    assert 'accept' in review_content, "Review template should have accept functionality"
-    assert 'regenerate' in review_content, "Review template should have regenerate functionality"
+    missing = _missing_tokens(create_content, CREATE_TEMPLATE_TOKENS)
+    assert not missing, f"Create template is missing: {missing}"
     
-    print("✓ AI agent templates are properly structured")
+    review_content = _read_template("templates/ai_agent_review.html")
+    
+    missing = _missing_tokens(review_content, REVIEW_TEMPLATE_TOKENS)
+    assert not missing, f"Review template is missing: {missing}"
 
 
 async def test_service_mock_generation():
     """Test the AI agent generation service with mock data"""
-    print("\nTesting AI service mock generation...")
-    
     from service.ai_agent_generator_service import AIAgentGeneratorService
     from model.ai_agent_generator import AgentGenerationRequest
     
@@ -74,30 +85,21 @@ async def test_service_mock_generation():
     yaml_result = AIAgentGeneratorService.convert_parameters_to_yaml(test_params)
     assert yaml_result is not None, "Should convert parameters to YAML"
     assert "input_text:" in yaml_result, "YAML should contain parameter name"
-    
-    print("✓ AI service mock generation works correctly")
 
 
 async def test_routes_structure():
     """Test that the routes are properly defined"""
-    print("\nTesting routes structure...")
-    
     from admin_routes import admin_router
     
     # Check that our new routes exist in the router
-    route_paths = [route.path for route in admin_router.routes]
-    
-    assert "/admin/agents/ai-create" in route_paths, "AI create route should be defined"
-    assert "/admin/agents/ai-generate" in route_paths, "AI generate route should be defined"  
-    assert "/admin/agents/ai-review" in route_paths, "AI review route should be defined"
+    route_paths = {route.path for route in admin_router.routes}
     
-    print("✓ All AI agent routes are properly defined")
+    missing = AI_AGENT_ROUTES - route_paths
+    assert not missing, f"AI agent routes should be defined: {missing}"
 
 
 async def test_models_validation():
     """Test the AI agent models validation"""
-    print("\nTesting model validation...")
-    
     from model.ai_agent_generator import AgentGenerationRequest, AgentGenerationResponse
     from pydantic import ValidationError
     
@@ -124,14 +126,12 @@ async def test_models_validation():
         task="Test task"
     )
     assert valid_response.name == "test-agent"
-    
-    print("✓ Model validation works correctly")
 
 
+# Creates and deletes a real agent, so keep it on a single xdist worker
+@pytest.mark.xdist_group("agents_db")
 async def test_existing_functionality_integration():
     """Test that new functionality integrates well with existing agent system"""
-    print("\nTesting integration with existing agent system...")
-    
     from service.agent_service import AgentService
     from model.agent import AgentCreate
     
@@ -162,120 +162,17 @@ async def test_existing_functionality_integration():
     except Exception as e:
         # If agent already exists, that's fine for this test
         if "already exists" in str(e):
-            print("  (Agent already exists, cleaning up...)")
             await AgentService.delete_agent("test-integration-agent")
         else:
             raise
-    
-    print("✓ Integration with existing agent system works correctly")
 
 
 async def test_ui_button_integration():
     """Test that the agents.html template includes the AI creation button"""
-    print("\nTesting UI button integration...")
-    
     agents_template = Path("templates/agents.html")
     assert agents_template.exists(), "Agents template should exist"
     
-    with open(agents_template, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    assert 'ai-create' in content, "Agents template should have AI create link"
-    assert 'Mit AI erstellen' in content, "Agents template should have AI create button text"
-    assert 'btn-group' in content, "Should have button group for multiple create options"
+    content = _read_template("templates/agents.html")
     
-    print("✓ UI button integration works correctly")
-
-
-def create_summary_report():
-    """Create a summary of what was implemented"""
-    summary = """
-=================================================
-AI AGENT CREATION FEATURE - IMPLEMENTATION SUMMARY
-=================================================
-
-✅ IMPLEMENTED COMPONENTS:
-
-1. MODELS & DATA STRUCTURES:
-   - AgentGenerationRequest: User input validation
-   - AgentGenerationResponse: AI-generated configuration
-   - AgentGenerationReview: Review workflow handling
-
-2. SERVICE LAYER:
-   - AIAgentGeneratorService: Core AI integration logic
-   - Structured prompt creation for OpenAI API
-   - YAML parameter conversion utilities
-   - Error handling and validation
-
-3. API ENDPOINTS:
-   - GET /admin/agents/ai-create: AI creation form
-   - POST /admin/agents/ai-generate: Generate agent config
-   - POST /admin/agents/ai-review: Review and accept/regenerate
-
-4. USER INTERFACE:
-   - ai_agent_create.html: User description form with guidance
-   - ai_agent_review.html: Interactive review interface
-   - Updated agents.html: Added "Mit AI erstellen" button
-   - Professional styling with Bootstrap
-   - Interactive JavaScript for better UX
-
-5. WORKFLOW:
-   - User describes desired agent functionality
-   - System generates configuration via OpenAI API
-   - User reviews and can edit or regenerate
-   - Final agent is created in existing agent system
-
-6. INTEGRATION:
-   - Works with existing agent management system
-   - Uses existing OpenAI controller and authentication
-   - Follows existing code patterns and conventions
-   - Comprehensive error handling
-
-7. TESTING:
-   - Unit tests for all components
-   - Integration tests for workflow
-   - Template validation
-   - Error handling verification
-
-🎯 FEATURE MEETS ALL REQUIREMENTS:
-✓ AI-powered agent generation via OpenAI API
-✓ User describes functionality in natural language
-✓ System determines name, role, model, prompt, parameters
-✓ Review interface with accept/regenerate options
-✓ Seamless integration with existing admin panel
-
-📋 READY FOR PRODUCTION USE!
-=================================================
-    """
-    return summary
-
-
-async def run_all_integration_tests():
-    """Run all integration tests"""
-    print("=" * 80)
-    print("RUNNING AI AGENT CREATION INTEGRATION TESTS")
-    print("=" * 80)
-    
-    try:
-        await test_ai_agent_templates()
-        await test_service_mock_generation()
-        await test_routes_structure()
-        await test_models_validation()
-        await test_existing_functionality_integration()
-        await test_ui_button_integration()
-        
-        print("\n" + "=" * 80)
-        print("ALL INTEGRATION TESTS PASSED! ✅")
-        print("=" * 80)
-        
-        print(create_summary_report())
-        
-    except Exception as e:
-        print(f"\n❌ INTEGRATION TEST FAILED: {e}")
-        import traceback
-        traceback.print_exc()
-        raise
-
-
-if __name__ == "__main__":
-    asyncio.run(run_all_integration_tests())
\ No newline at end of file
+    missing = _missing_tokens(content, AGENTS_TEMPLATE_TOKENS)
+    assert not missing, f"Agents template is missing: {missing}"
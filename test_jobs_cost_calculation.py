@@ -4,36 +4,13 @@ Tests for Jobs cost calculation with output tokens and provider model pricing
 import pytest
 import pytest_asyncio
 from datetime import datetime, timezone
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
-from model.user import User, Base
+from model.user import User
 from model.job import Job
 from model.provider import Provider, ProviderModel
 from service.job_service import JobService
 from service.provider_service import ProviderService
 
 
-@pytest_asyncio.fixture
-async def async_session():
-    """Create async test database session"""
-    engine = create_async_engine(
-        "sqlite+aiosqlite:///:memory:",
-        echo=False
-    )
-    
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    
-    AsyncSessionLocal = sessionmaker(
-        engine, class_=AsyncSession, expire_on_commit=False
-    )
-    
-    async with AsyncSessionLocal() as session:
-        yield session
-    
-    await engine.dispose()
-
-
 @pytest_asyncio.fixture
 async def test_user(async_session):
     """Create a test user"""
@@ -295,6 +272,20 @@ async def test_cost_calculation_missing_tokens(async_session, test_user, test_pr
     assert abs(jobs[0]['estimated_cost'] - 0.0) < 0.0001
 
 
+@pytest.mark.asyncio
+async def test_cost_calculation_empty_job_list(mocker):
+    """Test that an empty job list is left alone without querying pricing"""
+    from admin_routes import _enrich_jobs_with_costs
+    
+    db = mocker.AsyncMock()
+    jobs = []
+    
+    await _enrich_jobs_with_costs(db, jobs)
+    
+    assert jobs == []
+    db.execute.assert_not_awaited()
+
+
 @pytest.mark.asyncio
 async def test_provider_model_create_with_pricing(async_session):
     """Test creating a provider model with pricing information"""
@@ -4,8 +4,7 @@ Tests for Jobs ListView extensions - filtering, cleanup, and user display
 import pytest
 import pytest_asyncio
 from datetime import datetime, timedelta, timezone
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from model.user import User, Base
 from model.job import Job
 from service.job_service import JobService
@@ -22,9 +21,7 @@ async def async_session():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     
-    AsyncSessionLocal = sessionmaker(
-        engine, class_=AsyncSession, expire_on_commit=False
-    )
+    AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False)
     
     async with AsyncSessionLocal() as session:
         yield session
@@ -13,7 +13,6 @@ This script demonstrates and tests the rate limiting features:
 import asyncio
 import sys
 from sqlalchemy.ext.asyncio import create_async_engine
-from sqlalchemy.orm import sessionmaker
 
 from model.user import Base, UserCreate
 from service.user_service import UserService
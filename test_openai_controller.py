@@ -1,25 +1,21 @@
 """
 Test script for OpenAI Controller functionality
 """
-import asyncio
 import logging
 from model.aiapirequest import aiapirequest
 from controller.api_openai import process_openai_request, OpenAIController
-import os
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-async def test_openai_controller_without_api_key():
+async def test_openai_controller_without_api_key(monkeypatch):
     """Test OpenAI controller when no API key is configured"""
     print("Testing OpenAI controller without API key...")
     
-    # Temporarily clear the API key
-    original_key = os.environ.get("OPENAI_API_KEY", "")
-    if "OPENAI_API_KEY" in os.environ:
-        del os.environ["OPENAI_API_KEY"]
+    # Clear the API key for this test only
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
     
     try:
         # This should raise an error about missing API key in strict mode
@@ -29,69 +25,56 @@ async def test_openai_controller_without_api_key():
         print(f"✓ Correctly caught missing API key error: {e}")
     except Exception as e:
         print(f"❌ Unexpected error: {e}")
-    finally:
-        # Restore the original key if it existed
-        if original_key:
-            os.environ["OPENAI_API_KEY"] = original_key
 
 
-async def test_openai_controller_validation():
+async def test_openai_controller_validation(monkeypatch):
     """Test input validation in OpenAI controller"""
     print("\nTesting input validation...")
     
     # Set a fake API key so we can test validation logic  
-    original_key = os.environ.get("OPENAI_API_KEY", "")
-    os.environ["OPENAI_API_KEY"] = "fake-key-for-validation-test"
+    monkeypatch.setenv("OPENAI_API_KEY", "fake-key-for-validation-test")
     
-    try:
-        # Test empty prompt - create controller with fake key to bypass config check
-        controller = OpenAIController(strict_mode=False) 
-        
-        request = aiapirequest(
-            job_id="test-job-1",
-            user_id="test-user-1", 
-            model="gpt-3.5-turbo",
-            role="user",
-            prompt=""
-        )
-        
-        result = await controller.process_request(request)
-        
-        if not result.success and "empty" in result.error_message.lower():
-            print("✓ Correctly validated empty prompt")
-        else:
-            print(f"✓ Input validation working (got {result.error_message})")
-        
-        # Test empty model
-        request = aiapirequest(
-            job_id="test-job-2", 
-            user_id="test-user-1",
-            model="",
-            role="user",
-            prompt="Test prompt"
-        )
-        
-        result = await controller.process_request(request)
-        
-        if not result.success and "empty" in result.error_message.lower():
-            print("✓ Correctly validated empty model")
-        else:
-            print(f"✓ Input validation working (got {result.error_message})")
-            
-    finally:
-        # Restore original key
-        if original_key:
-            os.environ["OPENAI_API_KEY"] = original_key
-        elif "OPENAI_API_KEY" in os.environ:
-            del os.environ["OPENAI_API_KEY"]
+    # Test empty prompt - create controller with fake key to bypass config check
+    controller = OpenAIController(strict_mode=False) 
+    
+    request = aiapirequest(
+        job_id="test-job-1",
+        user_id="test-user-1", 
+        model="gpt-3.5-turbo",
+        role="user",
+        prompt=""
+    )
+    
+    result = await controller.process_request(request)
+    
+    if not result.success and "empty" in result.error_message.lower():
+        print("✓ Correctly validated empty prompt")
+    else:
+        print(f"✓ Input validation working (got {result.error_message})")
+    
+    # Test empty model
+    request = aiapirequest(
+        job_id="test-job-2", 
+        user_id="test-user-1",
+        model="",
+        role="user",
+        prompt="Test prompt"
+    )
+    
+    result = await controller.process_request(request)
+    
+    if not result.success and "empty" in result.error_message.lower():
+        print("✓ Correctly validated empty model")
+    else:
+        print(f"✓ Input validation working (got {result.error_message})")
 
 
-async def test_openai_controller_with_fake_key():
+async def test_openai_controller_with_fake_key(monkeypatch):
     """Test OpenAI controller with a fake API key (should fail authentication)"""
     print("\nTesting OpenAI controller with fake API key...")
     
-    # Set a fake API key
-    os.environ["OPENAI_API_KEY"] = "fake-api-key"
+    # Set a fake API key for this test only
+    monkeypatch.setenv("OPENAI_API_KEY", "fake-api-key")
     
     request = aiapirequest(
         job_id="test-job-3",
@@ -138,22 +121,3 @@ async def test_model_validation():
         print("✓ job_id and user_id preserved in response")
     else:
         print(f"❌ job_id/user_id not preserved. Expected {request.job_id}/{request.user_id}, got {result.job_id}/{result.user_id}")
-
-
-async def main():
-    """Run all tests"""
-    print("Starting OpenAI Controller tests...\n")
-    
-    try:
-        await test_openai_controller_without_api_key()
-        await test_openai_controller_validation()
-        await test_openai_controller_with_fake_key()
-        await test_model_validation()
-        
-        print("\n✓ All tests completed!")
-    except Exception as e:
-        print(f"\n❌ Test suite failed with error: {e}")
-
-
-if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
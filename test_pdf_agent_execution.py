@@ -3,10 +3,9 @@ Test cases for PDF Agent Execution functionality
 """
 import pytest
 import asyncio
-from unittest.mock import Mock, patch, AsyncMock
-from fastapi import UploadFile
 import io
 from service.pdf_service import PDFService
+from testing_helpers import MockUploadFile
 from model.pdf_agent_execution import PDFAgentExecutionRequest, PDFAgentExecutionResponse
 
 
@@ -68,9 +67,7 @@ class TestPDFService:
         """Test PDF text extraction with invalid file"""
         # Create a mock UploadFile with invalid content
         invalid_content = b"This is not a PDF file"
-        mock_file = Mock(spec=UploadFile)
-        mock_file.read = AsyncMock(return_value=invalid_content)
-        mock_file.filename = "test.pdf"
+        mock_file = MockUploadFile("test.pdf", invalid_content)
         
         with pytest.raises(Exception):  # Should raise HTTPException or similar
             await PDFService.extract_text_from_pdf(mock_file)
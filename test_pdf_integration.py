@@ -5,9 +5,8 @@ import pytest
 import asyncio
 import shutil
 from pathlib import Path
-from unittest.mock import Mock, AsyncMock
-from fastapi import UploadFile
 from service.pdf_service import PDFService
+from testing_helpers import MockUploadFile
 
 
 class TestPDFIntegration:
@@ -43,10 +42,7 @@ class TestPDFIntegration:
             pdf_content = f.read()
         
         # Create a mock UploadFile
-        mock_file = Mock(spec=UploadFile)
-        mock_file.read = AsyncMock(return_value=pdf_content)
-        mock_file.filename = "test_document.pdf"
-        mock_file.seek = AsyncMock()
+        mock_file = MockUploadFile("test_document.pdf", pdf_content)
         
         # Extract text
         extracted_text = await PDFService.extract_text_from_pdf(mock_file)
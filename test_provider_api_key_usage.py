@@ -2,153 +2,81 @@
 Test that API controllers use Provider entity API keys from database
 """
 import pytest
-import os
 from controller.api_gemini import GeminiController
 from controller.api_claude import ClaudeController
 from controller.api_openai import OpenAIController
 
 
 @pytest.mark.asyncio
-async def test_gemini_controller_accepts_api_key_parameter():
+async def test_gemini_controller_accepts_api_key_parameter(monkeypatch):
     """Test that Gemini controller accepts API key parameter"""
-    # Save and clear environment variable
-    original_key = os.environ.get("GEMINI_API_KEY")
-    if "GEMINI_API_KEY" in os.environ:
-        del os.environ["GEMINI_API_KEY"]
+    # Clear environment variable
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
     
-    try:
-        # Controller should accept api_key parameter in non-strict mode
-        test_api_key = "test-gemini-key-123"
-        controller = GeminiController(strict_mode=False, api_key=test_api_key)
-        
-        # In non-strict mode with fake key, client should be None but no exception
-        assert controller is not None
-        print("✓ Gemini controller accepts API key parameter without environment variable")
-        
-    finally:
-        # Restore original key if it existed
-        if original_key is not None:
-            os.environ["GEMINI_API_KEY"] = original_key
+    # Controller should accept api_key parameter in non-strict mode
+    test_api_key = "test-gemini-key-123"
+    controller = GeminiController(strict_mode=False, api_key=test_api_key)
+    
+    # In non-strict mode with fake key, client should be None but no exception
+    assert controller is not None
+    print("✓ Gemini controller accepts API key parameter without environment variable")
 
 
 @pytest.mark.asyncio
-async def test_claude_controller_accepts_api_key_parameter():
+async def test_claude_controller_accepts_api_key_parameter(monkeypatch):
     """Test that Claude controller accepts API key parameter"""
-    # Save and clear environment variable
-    original_key = os.environ.get("ANTHROPIC_API_KEY")
-    if "ANTHROPIC_API_KEY" in os.environ:
-        del os.environ["ANTHROPIC_API_KEY"]
+    # Clear environment variable
+    monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
+    
+    # Controller should accept api_key parameter in non-strict mode
+    test_api_key = "test-claude-key-123"
+    controller = ClaudeController(strict_mode=False, api_key=test_api_key)
     
-    try:
-        # Controller should accept api_key parameter in non-strict mode
-        test_api_key = "test-claude-key-123"
-        controller = ClaudeController(strict_mode=False, api_key=test_api_key)
-        
-        # Verify controller has the API key
-        assert controller is not None
-        assert controller.api_key == test_api_key
-        print("✓ Claude controller accepts API key parameter without environment variable")
-        
-    finally:
-        # Restore original key if it existed
-        if original_key is not None:
-            os.environ["ANTHROPIC_API_KEY"] = original_key
+    # Verify controller has the API key
+    assert controller is not None
+    assert controller.api_key == test_api_key
+    print("✓ Claude controller accepts API key parameter without environment variable")
 
 
 @pytest.mark.asyncio
-async def test_openai_controller_accepts_api_key_parameter():
+async def test_openai_controller_accepts_api_key_parameter(monkeypatch):
     """Test that OpenAI controller accepts API key parameter"""
-    # Save and clear environment variables
-    original_key = os.environ.get("OPENAI_API_KEY")
-    original_org = os.environ.get("OPENAI_ORG_ID")
-    if "OPENAI_API_KEY" in os.environ:
-        del os.environ["OPENAI_API_KEY"]
-    if "OPENAI_ORG_ID" in os.environ:
-        del os.environ["OPENAI_ORG_ID"]
+    # Clear environment variables
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.delenv("OPENAI_ORG_ID", raising=False)
+    
+    # Controller should accept api_key parameter in non-strict mode
+    test_api_key = "test-openai-key-123"
+    test_org_id = "test-org-456"
+    controller = OpenAIController(strict_mode=False, api_key=test_api_key, org_id=test_org_id)
     
-    try:
-        # Controller should accept api_key parameter in non-strict mode
-        test_api_key = "test-openai-key-123"
-        test_org_id = "test-org-456"
-        controller = OpenAIController(strict_mode=False, api_key=test_api_key, org_id=test_org_id)
-        
-        # Verify controller has the API key and org_id
-        assert controller is not None
-        assert controller.api_key == test_api_key
-        assert controller.org_id == test_org_id
-        print("✓ OpenAI controller accepts API key and org_id parameters without environment variables")
-        
-    finally:
-        # Restore original keys if they existed
-        if original_key is not None:
-            os.environ["OPENAI_API_KEY"] = original_key
-        if original_org is not None:
-            os.environ["OPENAI_ORG_ID"] = original_org
+    # Verify controller has the API key and org_id
+    assert controller is not None
+    assert controller.api_key == test_api_key
+    assert controller.org_id == test_org_id
+    print("✓ OpenAI controller accepts API key and org_id parameters without environment variables")
 
 
 @pytest.mark.asyncio
-async def test_controllers_fallback_to_environment():
+async def test_controllers_fallback_to_environment(monkeypatch):
     """Test that controllers fall back to environment variables when no API key provided"""
-    # Save original values
-    original_gemini = os.environ.get("GEMINI_API_KEY")
-    original_claude = os.environ.get("ANTHROPIC_API_KEY")
-    original_openai = os.environ.get("OPENAI_API_KEY")
-    original_org = os.environ.get("OPENAI_ORG_ID")
+    # Set environment variables
+    monkeypatch.setenv("GEMINI_API_KEY", "env-gemini-key")
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "env-claude-key")
+    monkeypatch.setenv("OPENAI_API_KEY", "env-openai-key")
+    monkeypatch.setenv("OPENAI_ORG_ID", "env-org-id")
     
-    try:
-        # Set environment variables
-        os.environ["GEMINI_API_KEY"] = "env-gemini-key"
-        os.environ["ANTHROPIC_API_KEY"] = "env-claude-key"
-        os.environ["OPENAI_API_KEY"] = "env-openai-key"
-        os.environ["OPENAI_ORG_ID"] = "env-org-id"
-        
-        # Controllers should use environment variables when no api_key provided
-        gemini_controller = GeminiController(strict_mode=False)
-        claude_controller = ClaudeController(strict_mode=False)
-        openai_controller = OpenAIController(strict_mode=False)
-        
-        # Verify they're initialized
-        assert gemini_controller is not None
-        assert claude_controller is not None
-        assert claude_controller.api_key == "env-claude-key"
-        assert openai_controller is not None
-        assert openai_controller.api_key == "env-openai-key"
-        assert openai_controller.org_id == "env-org-id"
-        
-        print("✓ Controllers correctly fall back to environment variables")
-        
-    finally:
-        # Clean up - restore original values or delete if didn't exist
-        if original_gemini is not None:
-            os.environ["GEMINI_API_KEY"] = original_gemini
-        elif "GEMINI_API_KEY" in os.environ:
-            del os.environ["GEMINI_API_KEY"]
-            
-        if original_claude is not None:
-            os.environ["ANTHROPIC_API_KEY"] = original_claude
-        elif "ANTHROPIC_API_KEY" in os.environ:
-            del os.environ["ANTHROPIC_API_KEY"]
-            
-        if original_openai is not None:
-            os.environ["OPENAI_API_KEY"] = original_openai
-        elif "OPENAI_API_KEY" in os.environ:
-            del os.environ["OPENAI_API_KEY"]
-            
-        if original_org is not None:
-            os.environ["OPENAI_ORG_ID"] = original_org
-        elif "OPENAI_ORG_ID" in os.environ:
-            del os.environ["OPENAI_ORG_ID"]
-
-
-if __name__ == "__main__":
-    import asyncio
+    # Controllers should use environment variables when no api_key provided
+    gemini_controller = GeminiController(strict_mode=False)
+    claude_controller = ClaudeController(strict_mode=False)
+    openai_controller = OpenAIController(strict_mode=False)
     
-    async def run_tests():
-        print("\nTesting Provider API Key Usage...\n")
-        await test_gemini_controller_accepts_api_key_parameter()
-        await test_claude_controller_accepts_api_key_parameter()
-        await test_openai_controller_accepts_api_key_parameter()
-        await test_controllers_fallback_to_environment()
-        print("\n✓ All provider API key usage tests passed!")
+    # Verify they're initialized
+    assert gemini_controller is not None
+    assert claude_controller is not None
+    assert claude_controller.api_key == "env-claude-key"
+    assert openai_controller is not None
+    assert openai_controller.api_key == "env-openai-key"
+    assert openai_controller.org_id == "env-org-id"
     
-    asyncio.run(run_tests())
+    print("✓ Controllers correctly fall back to environment variables")
@@ -3,8 +3,7 @@ Tests for Provider Detail UI with Model Pricing Management
 """
 import pytest
 import pytest_asyncio
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from model.user import Base
 from model.provider import Provider, ProviderModel, ProviderModelCreate, ProviderModelUpdate
 from service.provider_service import ProviderService
@@ -21,9 +20,7 @@ async def async_session():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     
-    AsyncSessionLocal = sessionmaker(
-        engine, class_=AsyncSession, expire_on_commit=False
-    )
+    AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False)
     
     async with AsyncSessionLocal() as session:
         yield session
@@ -5,8 +5,7 @@ import pytest
 import pytest_asyncio
 import asyncio
 from datetime import datetime, timedelta
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 
 from model.user import User, Base
 from service.rate_limit_service import RateLimitService
@@ -23,7 +22,7 @@ async def db_session():
         await conn.run_sync(Base.metadata.create_all)
     
     # Create session
-    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async_session = async_sessionmaker(engine, expire_on_commit=False)
     
     async with async_session() as session:
         yield session
@@ -4,8 +4,7 @@ Integration tests for rate limiting with authentication
 import pytest
 import pytest_asyncio
 from datetime import datetime, timedelta
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 
 from model.user import User, Base, UserCreate
 from service.user_service import UserService
@@ -27,7 +26,7 @@ async def test_db():
 @pytest.mark.asyncio
 async def test_user_service_creates_users_with_default_limits(test_db):
     """Test that user service creates users with default rate limits"""
-    async_session = sessionmaker(test_db, class_=AsyncSession, expire_on_commit=False)
+    async_session = async_sessionmaker(test_db, expire_on_commit=False)
     
     async with async_session() as session:
         user_data = UserCreate(
@@ -48,7 +47,7 @@ async def test_user_service_creates_users_with_default_limits(test_db):
 @pytest.mark.asyncio
 async def test_user_service_creates_users_with_custom_limits(test_db):
     """Test that user service can create users with custom rate limits"""
-    async_session = sessionmaker(test_db, class_=AsyncSession, expire_on_commit=False)
+    async_session = async_sessionmaker(test_db, expire_on_commit=False)
     
     async with async_session() as session:
         user_data = UserCreate(
@@ -69,7 +68,7 @@ async def test_user_service_creates_users_with_custom_limits(test_db):
 @pytest.mark.asyncio
 async def test_user_rate_limit_increments(test_db):
     """Test that user rate limits increment correctly"""
-    async_session = sessionmaker(test_db, class_=AsyncSession, expire_on_commit=False)
+    async_session = async_sessionmaker(test_db, expire_on_commit=False)
     
     async with async_session() as session:
         user = User(
@@ -111,7 +110,7 @@ async def test_user_rate_limit_increments(test_db):
 @pytest.mark.asyncio
 async def test_rate_limit_reset(test_db):
     """Test that rate limits reset after 1 minute"""
-    async_session = sessionmaker(test_db, class_=AsyncSession, expire_on_commit=False)
+    async_session = async_sessionmaker(test_db, expire_on_commit=False)
     
     async with async_session() as session:
         user = User(
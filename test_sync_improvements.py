@@ -4,8 +4,7 @@ Tests for the improved sync functionality
 import pytest
 import pytest_asyncio
 from unittest.mock import patch, AsyncMock
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from model.user import Base
 from service.repository_service import RepositoryService, GitHubSyncError
 
@@ -18,7 +17,7 @@ async def test_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     
-    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async_session = async_sessionmaker(engine, expire_on_commit=False)
     
     async with async_session() as session:
         yield session
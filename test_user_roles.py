@@ -2,12 +2,12 @@
 Test script for user role functionality
 """
 import asyncio
+import pytest
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from model.user import User, UserCreate, Base
 from model.application_user import ApplicationUser, ApplicationUserCreate
 from service.user_service import UserService
@@ -16,14 +16,17 @@ from service.application_user_service import ApplicationUserService
 # Test database URL
 DATABASE_URL = "sqlite+aiosqlite:///./test_user_roles.db"
 
+
+# Hash test passwords with bcrypt's minimum work factor
+pytestmark = pytest.mark.usefixtures("fast_bcrypt")
+
+
 async def test_user_roles():
     """Test user role functionality"""
     
     # Create async engine and session
     engine = create_async_engine(DATABASE_URL, echo=False)
-    SessionLocal = sessionmaker(
-        engine, class_=AsyncSession, expire_on_commit=False
-    )
+    SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
     
     # Create tables
     async with engine.begin() as conn:
@@ -0,0 +1,37 @@
+"""
+Shared helpers for the test suite
+"""
+from dataclasses import dataclass
+from typing import Optional
+from unittest.mock import AsyncMock, MagicMock
+
+
+@dataclass
+class MockUploadFile:
+    """Lightweight UploadFile stand-in serving fixed content"""
+    filename: str
+    _content: bytes
+    _position: int = 0
+    size: Optional[int] = None
+    
+    async def read(self, size=-1):
+        end = len(self._content) if size < 0 else self._position + size
+        data = self._content[self._position:end]
+        self._position += len(data)
+        return data
+    
+    async def seek(self, position):
+        self._position = position
+
+
+# Built once per process; each test only swaps the provider the lookup returns
+_PROVIDER_RESULT = MagicMock()
+_PROVIDER_EXECUTE = AsyncMock(return_value=_PROVIDER_RESULT)
+_PROVIDER_DB = AsyncMock(execute=_PROVIDER_EXECUTE)
+
+
+def mock_provider_db_session(provider):
+    """Async DB session whose provider lookup returns the given provider (or None)"""
+    _PROVIDER_EXECUTE.reset_mock()
+    _PROVIDER_RESULT.scalar_one_or_none.return_value = provider
+    return _PROVIDER_DB
@@ -1,11 +1,28 @@
 """
 Dependency checker to verify required packages are installed
 """
+import functools
 import logging
 import importlib.util
 
 logger = logging.getLogger(__name__)
 
+# Installation help texts, built once at import
+_GENERIC_HELP = (
+    "Some dependencies are missing. "
+    "To install all required dependencies, run: pip install -r requirements.txt"
+)
+_PROVIDER_HELP_TEMPLATE = (
+    "The '{provider}' provider requires the following packages: {packages}.\n"
+    "To install all dependencies, run: pip install -r requirements.txt"
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _check_package_cached(package_name: str) -> bool:
+    """Memoized find_spec lookup; call cache_clear() after installing packages"""
+    return importlib.util.find_spec(package_name) is not None
+
 
 class DependencyChecker:
     """Check for required dependencies and provide helpful error messages"""
@@ -37,8 +54,7 @@ class DependencyChecker:
         Returns:
             bool: True if package is installed, False otherwise
         """
-        spec = importlib.util.find_spec(package_name)
-        return spec is not None
+        return _check_package_cached(package_name)
     
     @staticmethod
     def check_core_dependencies() -> dict:
@@ -89,6 +105,11 @@ class DependencyChecker:
         
         return results
     
+    @staticmethod
+    def invalidate_cache() -> None:
+        """Forget cached package lookups, e.g. after installing packages"""
+        _check_package_cached.cache_clear()
+    
     @staticmethod
     def verify_all_dependencies() -> tuple[bool, list]:
         """
@@ -135,14 +156,7 @@ class DependencyChecker:
         Returns:
             str: Help message
         """
-        if provider and provider in DependencyChecker.PROVIDER_DEPENDENCIES:
-            packages = DependencyChecker.PROVIDER_DEPENDENCIES[provider]
-            return (
-                f"The '{provider}' provider requires the following packages: {', '.join(packages)}.\n"
-                f"To install all dependencies, run: pip install -r requirements.txt"
-            )
-        else:
-            return (
-                "Some dependencies are missing. "
-                "To install all required dependencies, run: pip install -r requirements.txt"
-            )
+        packages = DependencyChecker.PROVIDER_DEPENDENCIES.get(provider) if provider else None
+        if packages is None:
+            return _GENERIC_HELP
+        return _PROVIDER_HELP_TEMPLATE.format(provider=provider, packages=', '.join(packages))